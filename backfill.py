@@ -0,0 +1,160 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from pipeline import SOURCES, build_digest, digest_path
+import telemetry
+
+DIGEST_WORKERS = int(os.getenv("BACKFILL_DIGEST_WORKERS", "4"))
+WEEK_DAYS = 7
+
+# Longest range a single fetch covers, per source. Research backends return a capped
+# number of papers per call, so they fetch a week at a time like a weekly run does.
+SOURCE_CHUNK_DAYS = {"trends": 90, "twitter": WEEK_DAYS, "reddit": WEEK_DAYS, "research": WEEK_DAYS}
+# How far back a source can serve at all: X recent search only covers the last 7 days, and
+# Reddit's newest-first listings stop after about 1000 posts and cannot be queried by date.
+SOURCE_LOOKBACK_DAYS = {"twitter": 7, "reddit": 7}
+
+
+def _date(value):
+    return datetime.strptime(value, "%Y-%m-%d")
+
+
+def _fmt(value):
+    return value.strftime("%Y-%m-%d")
+
+
+def week_windows(start_date_str, end_date_str):
+    """The (start, end) windows of the weeks starting in [start, end), in main's 'last week' form."""
+    start, end = _date(start_date_str), _date(end_date_str)
+    weeks = []
+    while start < end:
+        weeks.append((_fmt(start), _fmt(start + timedelta(days=WEEK_DAYS))))
+        start += timedelta(days=WEEK_DAYS)
+    return weeks
+
+
+def merge_ranges(ranges):
+    """Merge (start, end) ranges that overlap or touch."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _utc_today():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _earliest_date(name, today):
+    """The first whole UTC day the source can still serve, or None if it has no lookback limit.
+
+    Ranges start at 00:00 of a date, so the day the lookback ends in is left out.
+    """
+    lookback = SOURCE_LOOKBACK_DAYS.get(name)
+    if lookback is None:
+        return None
+    return _date(_fmt(today - timedelta(days=lookback))) + timedelta(days=1)
+
+
+def _serves(name, week, today):
+    earliest = _earliest_date(name, today)
+    return earliest is None or _date(week[1]) > earliest
+
+
+def plan_fetches(weeks, sources=None, today=None):
+    """Per source, the (start, end) date ranges to fetch so every week is covered.
+
+    Overlapping week windows are merged into one range, cut to what the source can
+    still serve, and split into chunks of SOURCE_CHUNK_DAYS, newest first, so each
+    source's synced range in the item store grows contiguously.
+    """
+    today = today or _utc_today()
+    ranges = merge_ranges([(_date(start), _date(end)) for start, end in weeks])
+    plan = {}
+    for name in SOURCES if sources is None else sources:
+        earliest = _earliest_date(name, today)
+        chunk_days = SOURCE_CHUNK_DAYS.get(name)
+        tasks = []
+        for start, end in reversed(ranges):
+            if earliest is not None:
+                start = max(start, earliest)
+            while end > start:
+                chunk_start = max(start, end - timedelta(days=chunk_days)) if chunk_days else start
+                tasks.append((_fmt(chunk_start), _fmt(end)))
+                end = chunk_start
+        plan[name] = tasks
+    return plan
+
+
+def run_backfill(start_date_str, end_date_str, out_dir, sources=None):
+    """Regenerate the digest of every week starting in [start, end).
+
+    Each source works through its planned fetches on its own thread, paced by its own
+    rate limiter, so the backfill takes about as long as the slowest quota needs. A
+    week is summarized as soon as every source has synced it. Rerunning after a crash
+    resumes: synced ranges are no-ops in the item store, summaries come from the
+    response cache, and weeks whose PDF exists are skipped.
+    """
+    today = _utc_today()
+    weeks = week_windows(start_date_str, end_date_str)
+    os.makedirs(out_dir, exist_ok=True)
+    pending = [week for week in reversed(weeks) if not os.path.exists(digest_path(out_dir, *week, "pdf"))]
+    plan = plan_fetches(pending, sources, today)
+    print(f"🗓️ Backfilling {len(weeks)} weeks ({len(weeks) - len(pending)} already done): "
+          + ", ".join(f"{name} {len(tasks)} fetches" for name, tasks in plan.items()))
+
+    # The earliest date each source has synced down to; "" once it has nothing left to fetch.
+    synced_from = {name: None if tasks else "" for name, tasks in plan.items()}
+    lock = threading.Lock()
+    digests = {}
+    failed = []
+    skipped = []
+
+    def build(week):
+        serving = [name for name in plan if _serves(name, week, today)]
+        if not serving:
+            print(f"⏭️ {week[0]} to {week[1]} skipped: none of {', '.join(plan)} reaches back that far")
+            skipped.append(week)
+            return
+        try:
+            with telemetry.span("digest", week=week[0]):
+                build_digest(*week, out_dir, serving)
+            print(f"📄 {week[0]} to {week[1]} written")
+        except Exception as e:
+            print(f"❌ {week[0]} to {week[1]} failed: {e}")
+            failed.append(week)
+
+    def release_ready(digest_pool):
+        with lock:
+            while pending and all(low is not None and low <= pending[0][0] for low in synced_from.values()):
+                week = pending.pop(0)
+                digests[week] = digest_pool.submit(build, week)
+
+    def run_source(name, digest_pool):
+        tasks = plan[name]
+        for i, (start, end) in enumerate(tasks):
+            try:
+                SOURCES[name][0](start, end)
+            except Exception as e:
+                # Left unsynced; the week's digest retries the fetch itself.
+                print(f"⚠️ {name} {start} to {end} failed: {e}")
+            with lock:
+                synced_from[name] = start if i < len(tasks) - 1 else ""
+            release_ready(digest_pool)
+
+    with ThreadPoolExecutor(max_workers=DIGEST_WORKERS) as digest_pool:
+        release_ready(digest_pool)
+        with ThreadPoolExecutor(max_workers=max(1, len(plan))) as fetch_pool:
+            for future in [fetch_pool.submit(run_source, name, digest_pool) for name in plan]:
+                future.result()
+        release_ready(digest_pool)
+
+    done = len(digests) - len(failed) - len(skipped)
+    print(f"✅ Backfilled {done} of {len(digests)} weeks into '{out_dir}'"
+          + (f"; {len(skipped)} skipped, no selected source reaches back that far." if skipped else "."))
+    return failed
@@ -0,0 +1,91 @@
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from pipeline import collect_digest_data, build_scratchpad
+from render import generate_email_html_from_summary, write_pdf
+from summarizer import summarize
+import telemetry
+
+SUMMARY_WORKERS = int(os.getenv("BATCH_SUMMARY_WORKERS", "4"))
+RENDER_WORKERS = int(os.getenv("BATCH_RENDER_WORKERS", str(os.cpu_count() or 2)))
+# Render workers never fork the parent: abandoned research threads and the HTTP and store
+# threads may hold a lock (telemetry's, the HTTP client's) that a forked child would inherit locked.
+RENDER_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def check_subscriber_id(subscriber_id):
+    """Subscriber ids become file names in the output directory, so they cannot name a path."""
+    if subscriber_id in ("", ".", "..") or any(sep in subscriber_id for sep in ("/", "\\", "\0")):
+        raise ValueError(f"Invalid subscriber id {subscriber_id!r}: ids cannot be empty, '.' or '..', or contain path separators")
+    return subscriber_id
+
+
+def load_profiles(path):
+    """Subscriber profiles: a JSON list of {"id": ..., "categories": [...]}; no categories means everything."""
+    with open(path, "r", encoding="utf-8") as f:
+        profiles = json.load(f)
+    return [
+        {"id": check_subscriber_id(str(profile["id"])), "categories": sorted(profile.get("categories") or [])}
+        for profile in profiles
+    ]
+
+
+def personalize_summary(summary, categories):
+    """Keep the insights in the subscriber's categories, or all of them if none match."""
+    if not categories:
+        return summary
+    wanted = {category.lower() for category in categories}
+    insights = [i for i in summary["notable_insights"] if i["category"].lower() in wanted]
+    return {**summary, "notable_insights": insights or summary["notable_insights"]}
+
+
+def render_digest(summary):
+    """Render one digest to (html, pdf bytes); runs in a worker process."""
+    html = generate_email_html_from_summary(summary)
+    return html, write_pdf(html, None)
+
+
+def run_batch(profiles_path, out_dir, start_date_str, end_date_str):
+    """Generate a digest per subscriber from a single fetch of the source data.
+
+    Subscribers are grouped by category profile; each distinct scratchpad is
+    summarized once, and each distinct digest is rendered once.
+    """
+    profiles = load_profiles(profiles_path)
+    data = collect_digest_data(start_date_str, end_date_str)
+
+    groups = {}
+    for profile in profiles:
+        groups.setdefault(tuple(profile["categories"]), []).append(profile["id"])
+
+    scratchpads = {categories: build_scratchpad(data, list(categories)) for categories in groups}
+    distinct = set(scratchpads.values())
+    print(f"📦 {len(profiles)} subscribers, {len(groups)} profiles, {len(distinct)} distinct summaries")
+
+    with ThreadPoolExecutor(max_workers=SUMMARY_WORKERS) as pool:
+        summaries = dict(zip(distinct, pool.map(
+            lambda scratchpad: summarize(scratchpad, start_date_str, end_date_str), distinct
+        )))
+
+    digests = {
+        categories: personalize_summary(summaries[scratchpads[categories]], list(categories))
+        for categories in groups
+    }
+    # Spans recorded inside the worker processes are lost, so time the whole pool here.
+    with telemetry.span("render", source="batch"), ProcessPoolExecutor(
+        max_workers=RENDER_WORKERS, mp_context=multiprocessing.get_context(RENDER_START_METHOD)
+    ) as pool:
+        rendered = dict(zip(digests, pool.map(render_digest, digests.values())))
+
+    os.makedirs(out_dir, exist_ok=True)
+    for categories, subscriber_ids in groups.items():
+        html, pdf = rendered[categories]
+        for subscriber_id in subscriber_ids:
+            with open(os.path.join(out_dir, f"{subscriber_id}.html"), "w", encoding="utf-8") as f:
+                f.write(html)
+            with open(os.path.join(out_dir, f"{subscriber_id}.pdf"), "wb") as f:
+                f.write(pdf)
+
+    print(f"✅ Wrote {len(profiles)} digests to '{out_dir}'.")
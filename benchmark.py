@@ -0,0 +1,670 @@
+"""Offline benchmark for the digest pipeline.
+
+Every external service is replaced by a local stand-in: X, Semantic Scholar, SerpAPI
+and the OpenAI-compatible LLM endpoint by a stub HTTP server, and pytrends, PRAW and
+the arxiv client and PubMed loader (which manage their own connections) by in-process fakes.
+Latency, error rate and payload size are configurable, and the report gives per-stage
+and end-to-end latency, digests per minute and peak memory.
+
+    python benchmark.py --iterations 5 --latency 0.05 --error-rate 0.02 --items 50
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import types
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+import cache
+import main
+import ratelimit
+import render
+import store
+import summarizer
+import telemetry
+import tools
+
+WINDOW_DAYS = 7
+# Characters per streamed completion chunk, roughly a few tokens.
+COMPLETION_CHUNK_CHARS = 16
+
+SAMPLE_SUMMARY = {
+    "time_period": "Last Week",
+    "popular_trends": ["Sleep: +12% rising interest", "Yoga: +8% rising interest"],
+    "social_buzz": ["\"Morning walks changed my week\" — 420 likes"],
+    "notable_insights": [{
+        "date": "2025-01-01",
+        "title": "Sleep regularity and mood",
+        "description": "Regular sleep timing was associated with better mood.",
+        "impact": "Simple habit with measurable benefit.",
+        "source": "example.org/paper",
+        "category": "Sleep",
+    }],
+    "lifestyle_recommendations": "Keep a consistent bedtime.",
+    "future_outlook": "Sleep tracking keeps growing.",
+}
+
+
+class StubConfig:
+    def __init__(self, latency=0.05, jitter=0.5, error_rate=0.0, items=50, seed=0,
+                 token_latency=0.0, malformed_rate=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.items = items
+        self.token_latency = token_latency
+        self.malformed_rate = malformed_rate
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self):
+        with self._lock:
+            spread = self.random.uniform(1 - self.jitter, 1 + self.jitter)
+        time.sleep(max(0.0, self.latency * spread))
+
+    def should_fail(self):
+        with self._lock:
+            return self.random.random() < self.error_rate
+
+    def should_malform(self):
+        with self._lock:
+            return self.random.random() < self.malformed_rate
+
+    def recent_ts(self):
+        """A timestamp somewhere inside the benchmark window."""
+        with self._lock:
+            return time.time() - self.random.uniform(0, (WINDOW_DAYS - 1) * 86400)
+
+    def count(self):
+        with self._lock:
+            return self.random.randint(0, 5000)
+
+
+def _iso(ts):
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def _text(config, words=12):
+    vocabulary = ["sleep", "yoga", "protein", "stress", "walk", "fasting", "mindful", "recovery",
+                  "longevity", "habit", "study", "energy", "routine", "hydration", "focus"]
+    with config._lock:
+        return " ".join(config.random.choice(vocabulary) for _ in range(words))
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    config = None
+    stats = None
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with self.config._lock:
+            self.stats["requests"] += 1
+            self.stats["bytes"] += len(body)
+
+    def _handle(self, payload_fn):
+        self.config.delay()
+        if self.config.should_fail():
+            self._send_json({"error": "stub failure"}, status=503)
+            return
+        self._send_json(payload_fn())
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == "/2/tweets/search/recent" and not self._within_x_lookback(query):
+            self._send_json({"title": "Invalid Request", "detail": "start_time is older than 7 days"}, status=400)
+        elif url.path == "/2/tweets/search/recent":
+            self._handle(lambda: self._tweets(query))
+        elif url.path == "/2/tweets":
+            self._handle(lambda: self._tweet_lookup(query))
+        elif url.path == "/graph/v1/paper/search":
+            self._handle(self._semantic_scholar)
+        elif url.path == "/search.json":
+            self._handle(self._serpapi)
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if urlparse(self.path).path.endswith("/chat/completions") and request.get("stream"):
+            self._stream_chat_completion(request)
+        elif urlparse(self.path).path.endswith("/chat/completions"):
+            self._handle(lambda: self._chat_completion(request))
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def _tweet(self, tweet_id, created_ts):
+        return {
+            "id": tweet_id,
+            "text": _text(self.config, 20),
+            "created_at": _iso(created_ts),
+            "author_id": tweet_id.split("-")[1] if "-" in tweet_id else "0",
+            "public_metrics": {
+                "like_count": self.config.count(), "retweet_count": self.config.count() // 10,
+                "reply_count": self.config.count() // 20, "quote_count": self.config.count() // 50,
+            },
+        }
+
+    def _within_x_lookback(self, query):
+        """Like X, reject a start_time that recent search no longer covers."""
+        start_time = query.get("start_time", [None])[0]
+        if start_time is None:
+            return True
+        start_ts = datetime.strptime(start_time, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc).timestamp()
+        return start_ts >= time.time() - 7 * 24 * 3600
+
+    def _tweets(self, query):
+        page = int(query.get("next_token", ["0"])[0])
+        data = [
+            self._tweet(f"{page}-{i}-{random.getrandbits(32)}", self.config.recent_ts())
+            for i in range(self.config.items)
+        ]
+        meta = {"result_count": len(data)}
+        if page + 1 < tools.X_MAX_PAGES:
+            meta["next_token"] = str(page + 1)
+        return {"data": data, "meta": meta}
+
+    def _tweet_lookup(self, query):
+        ids = query.get("ids", [""])[0].split(",")
+        return {"data": [self._tweet(tweet_id, self.config.recent_ts()) for tweet_id in ids if tweet_id]}
+
+    def _semantic_scholar(self):
+        return {"data": [{
+            "title": _text(self.config, 8),
+            "abstract": _text(self.config, 60),
+            "url": f"https://example.org/s2/{i}",
+            "publicationDate": _iso(self.config.recent_ts())[:10],
+        } for i in range(self.config.items)]}
+
+    def _serpapi(self):
+        return {"organic_results": [{
+            "title": _text(self.config, 8),
+            "link": f"https://example.org/serp/{i}",
+            "snippet": _text(self.config, 30),
+        } for i in range(self.config.items)]}
+
+    def _completion_chunks(self):
+        """The summary split into token-sized chunks; malformed runs nest a list too deep."""
+        content = json.dumps(SAMPLE_SUMMARY, indent=2)
+        if self.config.should_malform():
+            content = content.replace('"popular_trends": [', '"popular_trends": [[', 1)
+        return [content[i:i + COMPLETION_CHUNK_CHARS] for i in range(0, len(content), COMPLETION_CHUNK_CHARS)]
+
+    @staticmethod
+    def _usage(request, content):
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in request.get("messages", [])) // 4
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": len(content) // 4,
+                "total_tokens": prompt_tokens + len(content) // 4}
+
+    def _chat_completion(self, request):
+        chunks = self._completion_chunks()
+        time.sleep(self.config.token_latency * len(chunks))
+        content = "".join(chunks)
+        return {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": self._usage(request, content),
+        }
+
+    def _stream_chat_completion(self, request):
+        """Server-sent events in the OpenAI streaming format, one chunk per token_latency."""
+        self.config.delay()
+        if self.config.should_fail():
+            self._send_json({"error": "stub failure"}, status=503)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        chunks = self._completion_chunks()
+        base = {"id": "chatcmpl-bench", "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": request.get("model", "stub")}
+        events = [{**base, "choices": [{"index": 0, "delta": {"content": chunk}, "finish_reason": None}]}
+                  for chunk in chunks]
+        events.append({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        if request.get("stream_options", {}).get("include_usage"):
+            events.append({**base, "choices": [], "usage": self._usage(request, "".join(chunks))})
+        sent = 0
+        try:
+            for event in events:
+                body = f"data: {json.dumps(event)}\n\n".encode("utf-8")
+                self.wfile.write(body)
+                self.wfile.flush()
+                sent += len(body)
+                time.sleep(self.config.token_latency)
+            self.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client abandoned a malformed completion.
+        with self.config._lock:
+            self.stats["requests"] += 1
+            self.stats["bytes"] += sent
+
+
+def start_stub_server(config):
+    handler = type("BoundStubHandler", (StubHandler,), {"config": config, "stats": {"requests": 0, "bytes": 0}})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# In-process fakes for clients that do not go through a URL we can point elsewhere.
+
+def _fake_call(config, label):
+    config.delay()
+    if config.should_fail():
+        raise RuntimeError(f"{label} stub failure")
+
+
+def make_fake_trendreq(config):
+    class FakeTrendReq:
+        def __init__(self, *args, **kwargs):
+            self.kw_list = []
+            self.timeframe = ""
+
+        def build_payload(self, kw_list, timeframe=""):
+            _fake_call(config, "trends")
+            self.kw_list = list(kw_list)
+            self.timeframe = timeframe
+
+        def interest_over_time(self):
+            start, end = self.timeframe.split()
+            index = pd.date_range(start, end, freq="D", name="date")
+            with config._lock:
+                data = {kw: [config.random.randint(0, 100) for _ in index] for kw in self.kw_list}
+            frame = pd.DataFrame(data, index=index)
+            # Like Google Trends, today's value is still being collected.
+            frame["isPartial"] = index.date >= datetime.now(timezone.utc).date()
+            return frame
+
+    return FakeTrendReq
+
+
+def make_fake_reddit(config):
+    class FakePost:
+        def __init__(self, created_utc, i):
+            self.id = f"p{i}{random.getrandbits(24):x}"
+            self.fullname = f"t3_{self.id}"
+            self.title = _text(config, 10)
+            self.score = config.count()
+            self.num_comments = config.count() // 10
+            self.created_utc = created_utc
+
+    class FakeSubreddit:
+        def new(self, limit=None):
+            _fake_call(config, "reddit")
+            now = time.time()
+            step = WINDOW_DAYS * 86400 * 1.5 / max(1, config.items)
+            for i in range(min(limit or config.items, config.items)):
+                yield FakePost(now - i * step, i)
+
+    class FakeReddit:
+        def subreddit(self, name):
+            return FakeSubreddit()
+
+        def info(self, fullnames=()):
+            _fake_call(config, "reddit")
+            for fullname in fullnames:
+                post = FakePost(time.time(), 0)
+                post.id = fullname.removeprefix("t3_")
+                post.fullname = fullname
+                yield post
+
+    client = FakeReddit()
+    return lambda: client
+
+
+def make_fake_loader(config, label):
+    class FakeDocument:
+        def __init__(self, i):
+            self.page_content = _text(config, 80)
+            self.metadata = {
+                "Title": _text(config, 8),
+                "Published": _iso(config.recent_ts())[:10],
+                "Summary": self.page_content,
+                "entry_id": f"https://example.org/{label}/{i}",
+                "uid": str(i),
+            }
+
+    class FakeLoader:
+        def __init__(self, query="", load_max_docs=5, **kwargs):
+            self.load_max_docs = load_max_docs
+
+        def load(self):
+            _fake_call(config, label)
+            return [FakeDocument(i) for i in range(min(self.load_max_docs, config.items))]
+
+    return FakeLoader
+
+
+def make_fake_arxiv(config):
+    class FakeResult:
+        def __init__(self, i):
+            self.title = _text(config, 8)
+            self.published = datetime.fromtimestamp(config.recent_ts(), tz=timezone.utc)
+            self.summary = _text(config, 80)
+            self.entry_id = f"https://example.org/arxiv/{i}"
+
+    class FakeSearch:
+        def __init__(self, query="", max_results=100, **kwargs):
+            self.max_results = max_results
+
+    class FakeClient:
+        def __init__(self, page_size=100, **kwargs):
+            pass
+
+        def results(self, search):
+            _fake_call(config, "arxiv")
+            return [FakeResult(i) for i in range(min(search.max_results, config.items))]
+
+    return types.SimpleNamespace(Search=FakeSearch, Client=FakeClient)
+
+
+def _null_pdf(html, filename):
+    data = b"%PDF-1.4\n% benchmark\n"
+    if filename is None:
+        return data
+    with open(filename, "wb") as f:
+        f.write(data)
+
+
+def install_stubs(config, server, pdf_backend):
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    tools.X_SEARCH_URL = f"{base}/2/tweets/search/recent"
+    tools.X_LOOKUP_URL = f"{base}/2/tweets"
+    tools.SEMANTIC_SCHOLAR_URL = f"{base}/graph/v1/paper/search"
+    tools.SERPAPI_URL = f"{base}/search.json"
+    summarizer.LLM_BASE_URL = f"{base}/v1"
+    summarizer.get_llm.cache_clear()
+    os.environ.setdefault("X_BEARER_TOKEN", "benchmark")
+    os.environ["OPENAI_API_KEY"] = os.environ.get("OPENAI_API_KEY") or "benchmark"
+
+    tools.TrendReq = make_fake_trendreq(config)
+    tools._trends_client = None
+    tools.get_reddit_client = make_fake_reddit(config)
+    tools.arxiv = make_fake_arxiv(config)
+    tools.PubMedLoader = make_fake_loader(config, "pubmed")
+    # Quotas are a property of the real services, not of the pipeline being measured.
+    tools.trends_limiter = ratelimit.RateLimiter(rate=1e6, burst=10**6)
+    summarizer.llm_limiter = ratelimit.RateLimiter(rate=1e6, burst=10**6)
+
+    render.PDF_BACKENDS["null"] = _null_pdf
+    render.PDF_BACKEND = pdf_backend
+    render.get_pdf_backend.cache_clear()
+
+
+@contextlib.contextmanager
+def isolated_state(root, warm):
+    """Point the cache and item store at a scratch directory, fresh per run unless warm."""
+    path = root if warm else tempfile.mkdtemp(dir=root)
+    cache.CACHE_DIR = os.path.join(path, "cache")
+    store.STORE_PATH = os.path.join(path, "store.sqlite3")
+    previous = os.getcwd()
+    os.chdir(path)
+    telemetry.reset()
+    try:
+        yield path
+    finally:
+        os.chdir(previous)
+
+
+class Recorder:
+    """Collects per-stage durations and, when tracing, peak traced memory."""
+
+    def __init__(self):
+        self.durations = {}
+        self.peaks = {}
+        self.tracing = False
+        # Running peaks of the stages currently open; tracemalloc has a single global peak,
+        # so a nested stage hands its peak up to the stage that encloses it.
+        self._open_peaks = []
+
+    def _enter(self):
+        if self._open_peaks:
+            self._open_peaks[-1] = max(self._open_peaks[-1], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        self._open_peaks.append(0)
+
+    def _exit(self, stage):
+        peak = max(self._open_peaks.pop(), tracemalloc.get_traced_memory()[1])
+        if self._open_peaks:
+            self._open_peaks[-1] = max(self._open_peaks[-1], peak)
+        self.peaks[stage] = max(self.peaks.get(stage, 0), peak)
+
+    def wrap(self, stage, func):
+        def timed(*args, **kwargs):
+            if self.tracing:
+                self._enter()
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                if self.tracing:
+                    self._exit(stage)
+                else:
+                    self.durations.setdefault(stage, []).append(elapsed)
+        return timed
+
+
+def first_section_timer(recorder, stream_summary):
+    """Record how long a streamed summary takes to deliver its first field."""
+    def timed(*args, on_field=None, **kwargs):
+        started = time.perf_counter()
+        first = True
+
+        def on_first_field(field, value):
+            nonlocal first
+            if first and not recorder.tracing:
+                recorder.durations.setdefault("main: first section", []).append(time.perf_counter() - started)
+            first = False
+            if on_field:
+                on_field(field, value)
+
+        return stream_summary(*args, on_field=on_first_field, **kwargs)
+    return timed
+
+
+def instrument_main(recorder):
+    main.collect_digest_data = recorder.wrap("main: fetch", main.collect_digest_data)
+    main.build_scratchpad = recorder.wrap("main: scratchpad", main.build_scratchpad)
+    main.summarize = recorder.wrap("main: llm", main.summarize)
+    main.stream_summary = recorder.wrap("main: llm", first_section_timer(recorder, main.stream_summary))
+    main.generate_email_html_from_summary = recorder.wrap("main: render html", main.generate_email_html_from_summary)
+    main.save_summary_pdf = recorder.wrap("main: render pdf", main.save_summary_pdf)
+
+
+TOOL_FUNCTIONS = [
+    "get_popular_wellness_trends",
+    "get_social_buzz_posts",
+    "get_reddit_wellness_discussions",
+    "get_research_papers",
+]
+
+
+def run_main(recorder, stream=False):
+    sys.argv = ["main.py", "--stream"] if stream else ["main.py"]
+    recorder.wrap("end-to-end: main()", main.main)()
+
+
+def run_tool(recorder, name, window):
+    recorder.wrap(f"tools: {name}", getattr(tools, name))(window)
+
+
+def run_benchmark(args):
+    config = StubConfig(args.latency, args.jitter, args.error_rate, args.items, args.seed,
+                        args.token_latency, args.malformed_rate)
+    server = start_stub_server(config)
+    install_stubs(config, server, args.pdf_backend)
+    recorder = Recorder()
+    instrument_main(recorder)
+    start_date, end_date = main.get_last_week_date_range()
+    window = f"{start_date} {end_date}"
+    root = tempfile.mkdtemp(prefix="wellness-bench-")
+
+    def one_pass():
+        for _ in range(args.iterations):
+            with isolated_state(root, args.warm):
+                run_main(recorder, args.stream)
+        for name in TOOL_FUNCTIONS:
+            for _ in range(args.iterations):
+                with isolated_state(root, args.warm):
+                    run_tool(recorder, name, window)
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        one_pass()
+    total = time.perf_counter() - started
+
+    # A second, traced pass for memory so tracemalloc overhead does not skew the timings.
+    args.iterations = 1
+    recorder.tracing = True
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        one_pass()
+    tracemalloc.stop()
+    server.shutdown()
+
+    main_runs = recorder.durations.get("end-to-end: main()", [])
+    return {
+        "config": {
+            "iterations": len(main_runs), "latency": args.latency, "jitter": args.jitter,
+            "error_rate": args.error_rate, "items": args.items, "warm": args.warm,
+            "pdf_backend": args.pdf_backend, "stream": args.stream,
+            "token_latency": args.token_latency, "malformed_rate": args.malformed_rate,
+        },
+        "stages": {
+            stage: {
+                "runs": len(values),
+                "mean_ms": statistics.fmean(values) * 1000,
+                "p50_ms": statistics.median(values) * 1000,
+                "p95_ms": sorted(values)[math.ceil(len(values) * 0.95) - 1] * 1000,
+                "peak_kib": recorder.peaks.get(stage, 0) / 1024,
+            }
+            for stage, values in recorder.durations.items()
+        },
+        "digests_per_minute": len(main_runs) / sum(main_runs) * 60 if main_runs else 0.0,
+        "stub_requests": server.RequestHandlerClass.stats["requests"],
+        "stub_bytes": server.RequestHandlerClass.stats["bytes"],
+        "max_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "total_seconds": total,
+    }
+
+
+# What each source imports the first time it is fetched (see tools.BACKENDS).
+SOURCE_BACKENDS = {
+    "trends": ["pd", "TrendReq"],
+    "twitter": ["ranking"],
+    "reddit": ["praw", "ranking"],
+    "research": ["arxiv", "PubMedLoader"],
+}
+
+
+def startup_scenarios():
+    """Python snippets timed from a fresh interpreter, after interpreter start-up itself."""
+    scenarios = {
+        "import main (cached/replay run)": "import main",
+        "render only": f"import main; main.generate_email_html_from_summary({SAMPLE_SUMMARY!r})",
+    }
+    for source, names in SOURCE_BACKENDS.items():
+        loads = "; ".join(f"tools.backend({name!r})" for name in names)
+        scenarios[f"single source: {source}"] = f"import main, tools; {loads}"
+    every = "; ".join(f"tools.backend({name!r})" for name in tools.BACKENDS)
+    scenarios["every backend + LLM client"] = f"import main, tools; {every}; main.get_llm()"
+    return scenarios
+
+
+def run_startup_benchmark(iterations):
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = {**os.environ, "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY") or "benchmark"}
+    stages = {}
+    for name, snippet in startup_scenarios().items():
+        code = (f"import time, warnings; warnings.filterwarnings('ignore'); started = time.perf_counter(); "
+                f"{snippet}; print(time.perf_counter() - started)")
+        values = []
+        for _ in range(iterations):
+            result = subprocess.run([sys.executable, "-c", code], cwd=here, env=env,
+                                    capture_output=True, text=True, check=True)
+            values.append(float(result.stdout.strip().splitlines()[-1]))
+        stages[name] = {
+            "runs": len(values),
+            "mean_ms": statistics.fmean(values) * 1000,
+            "p50_ms": statistics.median(values) * 1000,
+            "p95_ms": sorted(values)[math.ceil(len(values) * 0.95) - 1] * 1000,
+        }
+    return {"startup": stages}
+
+
+def print_startup_report(report):
+    print(f"{'startup scenario':40} {'runs':>5} {'mean ms':>10} {'p50 ms':>10} {'p95 ms':>10}")
+    for stage, row in report["startup"].items():
+        print(f"{stage:40} {row['runs']:>5} {row['mean_ms']:>10.1f} {row['p50_ms']:>10.1f} {row['p95_ms']:>10.1f}")
+
+
+def print_report(report):
+    print(f"{'stage':40} {'runs':>5} {'mean ms':>10} {'p50 ms':>10} {'p95 ms':>10} {'peak KiB':>10}")
+    for stage, row in report["stages"].items():
+        print(f"{stage:40} {row['runs']:>5} {row['mean_ms']:>10.1f} {row['p50_ms']:>10.1f} "
+              f"{row['p95_ms']:>10.1f} {row['peak_kib']:>10.0f}")
+    print(f"\nThroughput: {report['digests_per_minute']:.1f} digests/minute")
+    print(f"Stub traffic: {report['stub_requests']} requests, {report['stub_bytes'] / 1024:.0f} KiB")
+    print(f"Max RSS: {report['max_rss_kib'] / 1024:.0f} MiB, total {report['total_seconds']:.1f}s")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark for the wellness digest pipeline")
+    parser.add_argument("--iterations", type=int, default=3, help="Runs per measured function")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mean stub latency per call in seconds")
+    parser.add_argument("--jitter", type=float, default=0.5, help="Latency spread as a fraction of the mean")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability a stub call fails")
+    parser.add_argument("--items", type=int, default=50, help="Items per stub response")
+    parser.add_argument("--token-latency", type=float, default=0.002,
+                        help="Stub LLM delay per completion chunk in seconds")
+    parser.add_argument("--malformed-rate", type=float, default=0.0,
+                        help="Probability the stub LLM returns a summary that does not parse")
+    parser.add_argument("--stream", action="store_true", help="Run main() with a streamed summary")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--warm", action="store_true", help="Keep cache and item store between runs")
+    parser.add_argument("--pdf-backend", default="null", help="PDF backend to measure (default: null)")
+    parser.add_argument("--startup", action="store_true",
+                        help="Measure import time of main.py and each source backend in fresh interpreters instead")
+    parser.add_argument("--json", metavar="PATH", help="Also write the report as JSON")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.startup:
+        report = run_startup_benchmark(args.iterations)
+        print_startup_report(report)
+    else:
+        report = run_benchmark(args)
+        print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
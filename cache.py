@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import telemetry
+
+CACHE_DIR = os.getenv("WELLNESS_CACHE_DIR", ".wellness_cache")
+CACHE_MAX_BYTES = int(os.getenv("WELLNESS_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+# Seconds a cached response stays fresh, per source.
+SOURCE_TTLS = {
+    "trends": 6 * 3600,
+    "arxiv": 24 * 3600,
+    "pubmed": 24 * 3600,
+    "serpapi": 24 * 3600,
+    "semantic_scholar": 24 * 3600,
+    "llm": 7 * 24 * 3600,
+}
+DEFAULT_TTL = 3600
+
+_replay = False
+_lock = threading.Lock()
+
+
+class CacheMiss(Exception):
+    pass
+
+
+def set_replay(enabled: bool):
+    """In replay mode every lookup is served from disk, stale or not, and misses never hit the network."""
+    global _replay
+    _replay = enabled
+
+
+def is_replay() -> bool:
+    return _replay
+
+
+def make_key(source, query, start, end) -> str:
+    raw = json.dumps([source, query, start, end], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _entry_path(source, key):
+    return os.path.join(CACHE_DIR, source, f"{key}.json")
+
+
+def get(source, query, start=None, end=None, ttl=None):
+    path = _entry_path(source, make_key(source, query, start, end))
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        raise CacheMiss(f"{source}: {query}")
+
+    ttl = SOURCE_TTLS.get(source, DEFAULT_TTL) if ttl is None else ttl
+    if not _replay and time.time() - entry["created"] > ttl:
+        raise CacheMiss(f"{source}: {query} (expired)")
+
+    # Touch the file so eviction drops the least recently used entries first.
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return entry["value"]
+
+
+def put(source, query, value, start=None, end=None):
+    key = make_key(source, query, start, end)
+    path = _entry_path(source, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    entry = {
+        "source": source,
+        "query": query,
+        "start": start,
+        "end": end,
+        "created": time.time(),
+        "value": value,
+    }
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(entry, f, default=str)
+    os.replace(tmp_path, path)
+    evict()
+
+
+def evict(max_bytes=None):
+    """Delete least recently used entries until the cache fits in max_bytes."""
+    max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    with _lock:
+        entries = []
+        total = 0
+        for root, _, files in os.walk(CACHE_DIR):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+def cached_fetch(source, query, start, end, fetch, ttl=None):
+    """Return the cached value for (source, query, window), calling fetch() only on a miss."""
+    try:
+        value = get(source, query, start, end, ttl)
+        telemetry.incr("cache_requests_total", source=source, result="hit")
+        return value
+    except CacheMiss:
+        telemetry.incr("cache_requests_total", source=source, result="miss")
+        if _replay:
+            raise
+    value = fetch()
+    put(source, query, value, start, end)
+    return value
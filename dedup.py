@@ -0,0 +1,162 @@
+import hashlib
+import re
+
+import store
+
+# MinHash signature length, split into LSH bands of ROWS_PER_BAND values. Two items become
+# candidates when any band matches exactly; with 32 bands of 2 rows, pairs at the Jaccard
+# threshold almost always do, and candidates are then checked against the threshold.
+NUM_PERM = 64
+ROWS_PER_BAND = 2
+# Items whose word features overlap at least this much (Jaccard) are near-duplicates.
+JACCARD_THRESHOLD = 0.5
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_PERMUTATIONS = [
+    (
+        int.from_bytes(hashlib.blake2b(f"a{i}".encode(), digest_size=8).digest(), "big") % (_MERSENNE_PRIME - 1) + 1,
+        int.from_bytes(hashlib.blake2b(f"b{i}".encode(), digest_size=8).digest(), "big") % _MERSENNE_PRIME,
+    )
+    for i in range(NUM_PERM)
+]
+
+_URL_RE = re.compile(r"https?://\S+")
+_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+# Markers the sources add to an otherwise identical title or post.
+_TAG_RE = re.compile(r"^\s*(?:\[(?:pdf|html|htm|doc|citation|book)\]\s*)+")
+_RETWEET_RE = re.compile(r"^\s*rt\s+@\w+:?\s*")
+# A trailing ellipsis and the word before it, which may have been cut mid-word.
+_TRUNCATED_RE = re.compile(r"\s*\S*\s*(?:\.\.\.|…)\s*$")
+STOPWORDS = frozenset("""
+a an and are as at be by for from in into is it its of on or that the this to via vs was were with among
+""".split())
+
+
+def normalize(text):
+    text = _URL_RE.sub(" ", (text or "").lower())
+    return _NON_WORD_RE.sub(" ", text).strip()
+
+
+def features(text):
+    """Content words and adjacent word pairs, ignoring source markers, stopwords and cut-off endings."""
+    text = (text or "").lower()
+    for pattern in (_TAG_RE, _RETWEET_RE, _TRUNCATED_RE):
+        text = pattern.sub(" ", text)
+    words = [word for word in normalize(text).split() if word not in STOPWORDS]
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])} or {""}
+
+
+def minhash(feature_set):
+    """MinHash signature of a feature set, a tuple of NUM_PERM values."""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+        for feature in feature_set
+    ]
+    return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b)
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of the feature sets behind two signatures."""
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+def band_keys(signature):
+    """One integer key per LSH band."""
+    return [
+        int.from_bytes(hashlib.blake2b(repr((i, signature[i:i + ROWS_PER_BAND])).encode(), digest_size=7).digest(), "big")
+        for i in range(0, NUM_PERM, ROWS_PER_BAND)
+    ]
+
+
+def _encode(signature):
+    return ",".join(f"{value:x}" for value in signature)
+
+
+def _decode(encoded):
+    return tuple(int(value, 16) for value in encoded.split(","))
+
+
+def _digest(encoded):
+    return hashlib.blake2b(encoded.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class SignatureIndex:
+    """In-memory LSH index for near-duplicate lookups within one batch.
+
+    Candidates sharing a band are checked against their exact feature sets, which
+    are at hand within a batch, rather than the signature estimate.
+    """
+
+    def __init__(self):
+        self._buckets = {}
+
+    def find(self, feature_set, keys):
+        for key in keys:
+            for other in self._buckets.get(key, ()):
+                if jaccard(feature_set, other) >= JACCARD_THRESHOLD:
+                    return True
+        return False
+
+    def add(self, feature_set, keys):
+        for key in keys:
+            self._buckets.setdefault(key, []).append(feature_set)
+
+
+def seen_before(kind, signature, before_ts):
+    """True if a near-duplicate was stored for an item timestamped before before_ts."""
+    keys = band_keys(signature)
+    rows = store.connect().execute(
+        "SELECT DISTINCT m.signature FROM minhash_bands b JOIN minhashes m ON m.kind = b.kind AND m.digest = b.digest "
+        f"WHERE b.kind = ? AND b.band_key IN ({','.join('?' * len(keys))}) AND m.first_ts < ?",
+        (kind, *keys, before_ts),
+    ).fetchall()
+    return any(similarity(signature, _decode(other)) >= JACCARD_THRESHOLD for (other,) in rows)
+
+
+def remember(kind, entries):
+    """Persist (signature, ts) pairs, keeping the earliest timestamp seen for each signature."""
+    encoded = [(_encode(signature), signature, ts) for signature, ts in entries]
+    conn = store.connect()
+    with conn:
+        conn.executemany(
+            "INSERT INTO minhashes (kind, digest, signature, first_ts) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (kind, digest) DO UPDATE SET first_ts = MIN(first_ts, excluded.first_ts)",
+            [(kind, _digest(text), text, ts) for text, _, ts in encoded],
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO minhash_bands (kind, band_key, digest) VALUES (?, ?, ?)",
+            [(kind, key, _digest(text)) for text, signature, _ in encoded for key in band_keys(signature)],
+        )
+
+
+def dedupe(records, text_fn, kind=None, ts_fn=None, window_start_ts=None):
+    """Drop near-duplicate records, keeping the first of each group, so pass them best first.
+
+    With kind set, records whose near-duplicate was already seen for an item dated
+    before window_start_ts (an earlier week) are dropped too, and every record's
+    signature is remembered for later runs.
+    """
+    index = SignatureIndex()
+    kept = []
+    seen = []
+    for record in records:
+        feature_set = features(text_fn(record))
+        signature = minhash(feature_set)
+        keys = band_keys(signature)
+        ts = ts_fn(record) if ts_fn else None
+        if kind is not None and ts is not None:
+            seen.append((signature, ts))
+        if index.find(feature_set, keys):
+            continue
+        index.add(feature_set, keys)
+        if kind is not None and window_start_ts is not None and seen_before(kind, signature, window_start_ts):
+            continue
+        kept.append(record)
+
+    if seen:
+        remember(kind, seen)
+    return kept
@@ -0,0 +1,152 @@
+import os
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import telemetry
+from ratelimit import RateLimiter
+
+# (connect, read) timeouts in seconds, per host.
+DEFAULT_TIMEOUT = (5, 30)
+HOST_TIMEOUTS = {
+    "api.twitter.com": (5, 20),
+    "api.semanticscholar.org": (5, 20),
+    "serpapi.com": (5, 45),
+    "oauth.reddit.com": (5, 20),
+    "trends.google.com": (5, 30),
+}
+
+# Published request quotas per host as (requests, per seconds), paced client-side so long
+# runs such as a backfill never burn through a window and stall on a 429.
+HOST_RATE_LIMITS = {
+    "api.twitter.com": (450, 900),
+    "api.semanticscholar.org": (100, 300),
+    "serpapi.com": (int(os.getenv("SERPAPI_REQUESTS_PER_HOUR", "100")), 3600),
+}
+# Requests a host may receive back to back before pacing kicks in.
+RATE_LIMIT_BURST = 10
+
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Longest we are willing to sleep for a rate-limit window to reset before giving up.
+MAX_RATE_LIMIT_WAIT = 900.0
+
+_sessions = {}
+_limiters = {}
+_blocked_until = {}
+_lock = threading.Lock()
+
+
+class RateLimited(requests.HTTPError):
+    pass
+
+
+def new_session():
+    """A keep-alive session with a connection pool."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session(name="default"):
+    """A new_session() shared by everything using the same name."""
+    with _lock:
+        session = _sessions.get(name)
+        if session is None:
+            session = _sessions[name] = new_session()
+        return session
+
+
+def timeout_for(url):
+    return HOST_TIMEOUTS.get(urlparse(url).hostname, DEFAULT_TIMEOUT)
+
+
+def _backoff(attempt):
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def _reset_delay(response):
+    """Seconds until the server says we may retry, from Retry-After or x-rate-limit-reset."""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    reset = response.headers.get("x-rate-limit-reset") or response.headers.get("x-ratelimit-reset")
+    if reset and reset.replace(".", "", 1).isdigit():
+        reset = float(reset)
+        # X sends an epoch timestamp, Reddit a number of seconds.
+        return max(0.0, reset - time.time()) if reset > 1e9 else reset
+    return None
+
+
+def _note_rate_limit(host, response):
+    remaining = response.headers.get("x-rate-limit-remaining") or response.headers.get("x-ratelimit-remaining")
+    if response.status_code == 429 or (remaining is not None and float(remaining) < 1):
+        delay = _reset_delay(response)
+        if delay is not None:
+            with _lock:
+                _blocked_until[host] = time.time() + delay
+
+
+def _limiter_for(host):
+    with _lock:
+        if host not in _limiters:
+            limit = HOST_RATE_LIMITS.get(host)
+            _limiters[host] = RateLimiter(*limit, burst=RATE_LIMIT_BURST) if limit else None
+        return _limiters[host]
+
+
+def _wait_for_host(host):
+    limiter = _limiter_for(host)
+    if limiter is not None:
+        limiter.acquire()
+    with _lock:
+        wait_for = _blocked_until.get(host, 0) - time.time()
+    if wait_for > MAX_RATE_LIMIT_WAIT:
+        raise RateLimited(f"{host} rate limit resets in {wait_for:.0f}s")
+    if wait_for > 0:
+        time.sleep(wait_for)
+
+
+def request(method, url, session_name="default", **kwargs):
+    """Send a request through the pooled session with timeouts, retries and rate-limit handling."""
+    host = urlparse(url).hostname
+    kwargs.setdefault("timeout", timeout_for(url))
+    session = get_session(session_name)
+
+    for attempt in range(MAX_RETRIES + 1):
+        _wait_for_host(host)
+        try:
+            response = session.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            telemetry.incr("http_requests_total", host=host, status="error")
+            if attempt == MAX_RETRIES:
+                raise
+            telemetry.incr("http_retries_total", host=host)
+            time.sleep(_backoff(attempt))
+            continue
+
+        telemetry.incr("http_requests_total", host=host, status=response.status_code)
+        telemetry.incr("http_response_bytes_total", len(response.content), host=host)
+        _note_rate_limit(host, response)
+        if response.status_code in RETRY_STATUSES and attempt < MAX_RETRIES:
+            telemetry.incr("http_retries_total", host=host)
+            # 429s are handled by _wait_for_host when the server told us when to come back.
+            if response.status_code != 429 or _reset_delay(response) is None:
+                time.sleep(_backoff(attempt))
+            continue
+
+        response.raise_for_status()
+        return response
+
+
+def get_json(url, **kwargs):
+    return request("GET", url, **kwargs).json()
@@ -0,0 +1,152 @@
+import contextvars
+import json
+import os
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from tools import (
+    get_popular_wellness_trends,
+    get_tweet_records,
+    get_reddit_records,
+    get_paper_records,
+    format_buzz,
+    format_paper,
+    top_social_buzz,
+)
+from summarizer import compact_scratchpad, summarize
+from search import build_query, rank_papers
+from dedup import normalize
+from render import generate_email_html_from_summary, write_pdf
+import telemetry
+
+TOP_ITEMS = 5
+# Ranked buzz items kept for personalization and the paper query; the rest never reach a digest.
+BUZZ_CANDIDATES = 50
+# Top buzz items whose words join the trend keywords in the paper relevance query.
+QUERY_BUZZ_ITEMS = 20
+
+# Words and phrases that mark a buzz item or paper as relevant to a WellnessInsight category.
+# They match whole words only, in the singular or with a plural "s".
+CATEGORY_KEYWORDS = {
+    "Sleep": ["sleep", "sleeping", "insomnia", "circadian", "nap", "napping", "melatonin", "rest day"],
+    "Nutrition": ["nutrition", "diet", "food", "eat", "eating", "fasting", "protein", "vitamin", "plant-based", "meal"],
+    "Exercise": ["exercise", "fitness", "workout", "training", "yoga", "running", "gym", "strength", "posture"],
+    "Mental Health": ["mental", "anxiety", "depression", "stress", "mindful", "mindfulness", "meditation",
+                      "therapy", "burnout"],
+    "Longevity": ["longevity", "aging", "ageing", "lifespan", "healthspan"],
+}
+
+
+def get_last_week_date_range():
+    today = datetime.today()
+    start_date = today - timedelta(days=7)
+    return start_date.strftime('%Y-%m-%d'), today.strftime('%Y-%m-%d')
+
+def _fetch_source(name, func):
+    with telemetry.span("fetch", source=name):
+        return func()
+
+# Every source a digest can draw on: name -> (fetch(start_date, end_date), output when it
+# fails or is skipped). A source's client library is only imported once it is fetched.
+SOURCES = {
+    "trends": (lambda start, end: get_popular_wellness_trends(f"{start} {end}").strip(), ""),
+    "twitter": (get_tweet_records, []),
+    "reddit": (get_reddit_records, []),
+    "research": (get_paper_records, []),
+}
+
+def fetch_all_sources(start_date_str, end_date_str, sources=None):
+    """Call the sources concurrently for the date window and collect their outputs.
+
+    Trends come back as formatted text; tweets, Reddit posts and papers as
+    structured records. Sources not named in sources (default: all) come back empty.
+    """
+    names = list(SOURCES if sources is None else sources)
+    results = {name: default[:] for name, (_, default) in SOURCES.items()}
+
+    with ThreadPoolExecutor(max_workers=max(1, len(names))) as pool:
+        # Run each fetch in a copy of this context so its span nests under the caller's.
+        futures = {
+            name: pool.submit(
+                contextvars.copy_context().run, _fetch_source, name,
+                lambda fetch=SOURCES[name][0]: fetch(start_date_str, end_date_str),
+            )
+            for name in names
+        }
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                print(f"⚠️ {name} fetch failed: {e}")
+                telemetry.incr("source_fallbacks_total", source=name, reason="error")
+    return results
+
+def collect_digest_data(start_date_str, end_date_str, sources=None):
+    """Fetch every source once and rank it: the shared input for one or many digests."""
+    outputs = fetch_all_sources(start_date_str, end_date_str, sources)
+    buzz = outputs["twitter"] + outputs["reddit"]
+    with telemetry.span("parse", source="buzz"):
+        ranked_buzz = top_social_buzz(buzz, start_date_str, k=BUZZ_CANDIDATES)
+    trends = [line for line in outputs["trends"].splitlines() if line.strip()]
+    # Papers most relevant to this week's trends and buzz come first.
+    with telemetry.span("parse", source="research"):
+        query = build_query(trends, [record["text"] for record in ranked_buzz[:QUERY_BUZZ_ITEMS]])
+        papers = rank_papers(outputs["research"], query)
+    return {
+        "start_date": start_date_str,
+        "end_date": end_date_str,
+        "trends": trends,
+        # Ranked and deduplicated, but not yet cut down to the top items.
+        "buzz": ranked_buzz,
+        "papers": papers,
+    }
+
+def matches_categories(text, categories):
+    # Normalized words padded with spaces, so keywords only match at word boundaries.
+    text = f" {normalize(text)} "
+    return any(
+        f" {phrase} " in text or f" {phrase}s " in text
+        for category in categories
+        for phrase in map(normalize, CATEGORY_KEYWORDS.get(category, [category]))
+    )
+
+def _personalize(items, text_fn, categories):
+    """Items matching the categories first, then the rest, so every section stays filled."""
+    if not categories:
+        return items
+    matching = [item for item in items if matches_categories(text_fn(item), categories)]
+    matched_ids = {id(item) for item in matching}
+    return matching + [item for item in items if id(item) not in matched_ids]
+
+def build_scratchpad(data, categories=None):
+    buzz = _personalize(data["buzz"], lambda record: record["text"], categories)
+    papers = _personalize(data["papers"], lambda paper: f"{paper['title']} {paper['summary']}", categories)
+    return compact_scratchpad({
+        "POPULAR TRENDS": data["trends"],
+        "SOCIAL BUZZ": [f"- {format_buzz(record)}" for record in buzz[:TOP_ITEMS]],
+        "NOTABLE INSIGHTS": [format_paper(paper) for paper in papers[:TOP_ITEMS]],
+    })
+
+def digest_path(out_dir, start_date_str, end_date_str, extension):
+    return os.path.join(out_dir, f"{start_date_str}_{end_date_str}.{extension}")
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data if isinstance(data, bytes) else data.encode("utf-8"))
+    os.replace(tmp_path, path)
+
+def build_digest(start_date_str, end_date_str, out_dir, sources=None):
+    """Fetch, summarize and render the window's digest into out_dir as <start>_<end>.json/.html/.pdf.
+
+    The PDF is written last, so its presence marks a finished digest. Returns (summary, html, pdf bytes).
+    """
+    data = collect_digest_data(start_date_str, end_date_str, sources)
+    summary = summarize(build_scratchpad(data), start_date_str, end_date_str)
+    html = generate_email_html_from_summary(summary)
+    pdf = write_pdf(html, None)
+    os.makedirs(out_dir, exist_ok=True)
+    _write_atomic(digest_path(out_dir, start_date_str, end_date_str, "json"), json.dumps(summary, indent=2))
+    _write_atomic(digest_path(out_dir, start_date_str, end_date_str, "html"), html)
+    _write_atomic(digest_path(out_dir, start_date_str, end_date_str, "pdf"), pdf)
+    return summary, html, pdf
@@ -0,0 +1,42 @@
+import heapq
+import time
+
+import numpy as np
+import pandas as pd
+
+# Engagement older than this counts half as much.
+RECENCY_HALF_LIFE_SECONDS = 2 * 24 * 3600
+SHARE_WEIGHT = 2.0
+COMMENT_WEIGHT = 1.5
+
+
+def engagement_scores(records, now=None, half_life=RECENCY_HALF_LIFE_SECONDS):
+    """Score buzz records on one scale across sources.
+
+    Records carry likes (likes or upvotes), shares, comments, created_ts and source.
+    Engagement is log-scaled, min-max normalized within each source so that X likes
+    and Reddit upvotes are comparable, then decayed by age.
+    """
+    if not records:
+        return np.array([])
+    now = time.time() if now is None else now
+    frame = pd.DataFrame.from_records(records, columns=["source", "likes", "shares", "comments", "created_ts"])
+    counts = frame[["likes", "shares", "comments"]].fillna(0).clip(lower=0).astype(float)
+
+    raw = np.log1p(counts["likes"] + SHARE_WEIGHT * counts["shares"]) + COMMENT_WEIGHT * np.log1p(counts["comments"])
+    by_source = raw.groupby(frame["source"])
+    low = by_source.transform("min")
+    span = by_source.transform("max") - low
+    normalized = ((raw - low) / span.where(span > 0)).fillna(1.0)
+
+    # Records without a timestamp (placeholder data) get the minimum score, below every real item.
+    age = (now - frame["created_ts"].astype(float)).clip(lower=0)
+    decay = np.power(0.5, age / half_life).fillna(0.0)
+    return (normalized * decay).to_numpy()
+
+
+def top_k(records, k, now=None):
+    """The k highest-scoring records, best first; ties keep their input order."""
+    scores = engagement_scores(records, now=now)
+    best = heapq.nlargest(k, range(len(records)), key=scores.__getitem__)
+    return [records[i] for i in best]
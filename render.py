@@ -0,0 +1,185 @@
+import os
+import shutil
+from functools import lru_cache
+
+from jinja2 import Environment
+
+import telemetry
+
+PDF_BACKEND = os.getenv("PDF_BACKEND", "auto")
+
+DOCUMENT_HEAD = """
+<html>
+<head>
+    <meta charset='UTF-8'>
+    <style>
+        body { font-family: 'Segoe UI', sans-serif; padding: 30px; color: #333; line-height: 1.6; }
+        h1 { color: #34a853; }
+        h2 { border-bottom: 1px solid #ddd; padding-bottom: 5px; }
+        .section { margin-bottom: 30px; }
+        .insight { margin-bottom: 20px; }
+        a { color: #34a853; text-decoration: underline; }
+    </style>
+</head>
+<body>
+"""
+
+DOCUMENT_TAIL = """
+</body>
+</html>
+"""
+
+# One template per summary field, so sections can also be rendered on their own.
+SECTION_TEMPLATES = {
+    "time_period": """
+    <h1>🌿 Wellness Digest: {{ value }}</h1>
+""",
+    "popular_trends": """
+    <div class='section'><h2>📈 What's Trending Online</h2>
+    <ul>
+        {% for name, sep, detail in value | map('partition', ':') %}
+        <li>{% if sep %}<strong>{{ name }}</strong>: {{ detail }}{% else %}{{ name }}{% endif %}</li>
+        {% endfor %}
+    </ul>
+    </div>
+""",
+    "social_buzz": """
+    <div class='section'><h2>💬 What People Are Saying</h2>
+    <ul>
+        {% for buzz in value %}
+        <li>{{ buzz }}</li>
+        {% endfor %}
+    </ul></div>
+""",
+    "notable_insights": """
+    <div class='section'><h2>📚 What Research Says</h2>
+        {% for insight in value %}
+        <div class='insight'>
+            <strong>{{ insight.date }} - {{ insight.title }}</strong>
+            <p>{{ insight.description }}</p>
+            <p><em>Impact:</em> {{ insight.impact }}</p>
+            <p><strong>Category:</strong> {{ insight.category }}</p>
+            {% set url = insight.source | clean_url %}
+            <p><strong>Source:</strong> <a href="{{ url }}" target="_blank" rel="noopener noreferrer">{{ url }}</a></p>
+        </div>
+        {% endfor %}
+    </div>
+""",
+    "lifestyle_recommendations": """
+    <div class='section'><h2>🧠 Recommendations</h2><p>{{ value }}</p></div>
+""",
+    "future_outlook": """
+    <div class='section'><h2>🌟 Wellness in the Spotlight</h2><p>{{ value }}</p></div>
+""",
+}
+SECTION_ORDER = list(SECTION_TEMPLATES)
+
+
+def clean_url(url):
+    if url and not url.startswith(('http://', 'https://')):
+        return 'https://' + url
+    return url
+
+
+def _partition(text, sep):
+    return str(text).partition(sep)
+
+
+_env = Environment(autoescape=True, trim_blocks=True, lstrip_blocks=True)
+_env.filters["clean_url"] = clean_url
+_env.filters["partition"] = _partition
+
+
+@lru_cache(maxsize=None)
+def _template(field):
+    """Compile each section template once per process."""
+    return _env.from_string(SECTION_TEMPLATES[field])
+
+
+def render_section(field, value) -> str:
+    return _template(field).render(value=value)
+
+
+def generate_email_html_from_summary(summary: dict) -> str:
+    with telemetry.span("render", source="html"):
+        body = "".join(render_section(field, summary[field]) for field in SECTION_ORDER)
+        return DOCUMENT_HEAD + body + DOCUMENT_TAIL
+
+
+class SectionStream:
+    """Write sections to out as their fields arrive, always in document order."""
+
+    def __init__(self, out):
+        self.out = out
+        self.parts = []
+        self.pending = {}
+        self.rendered = 0
+        self._emit(DOCUMENT_HEAD)
+
+    def _emit(self, text):
+        self.parts.append(text)
+        self.out.write(text)
+        self.out.flush()
+
+    def add(self, field, value):
+        """Queue a field; returns the fields rendered as a result."""
+        self.pending[field] = value
+        rendered = []
+        while self.rendered < len(SECTION_ORDER) and SECTION_ORDER[self.rendered] in self.pending:
+            field = SECTION_ORDER[self.rendered]
+            self._emit(render_section(field, self.pending.pop(field)))
+            self.rendered += 1
+            rendered.append(field)
+        return rendered
+
+    def close(self):
+        self._emit(DOCUMENT_TAIL)
+        return "".join(self.parts)
+
+
+def _weasyprint_pdf(html, filename):
+    from weasyprint import HTML
+    return HTML(string=html).write_pdf(filename)
+
+
+def _wkhtmltopdf_pdf(html, filename):
+    import pdfkit
+    return pdfkit.from_string(html, filename or False, configuration=_wkhtmltopdf_config())
+
+
+@lru_cache(maxsize=1)
+def _wkhtmltopdf_config():
+    import pdfkit
+    binary = os.getenv("WKHTMLTOPDF_PATH") or shutil.which("wkhtmltopdf")
+    if not binary:
+        raise RuntimeError("wkhtmltopdf not found; install it or set WKHTMLTOPDF_PATH.")
+    return pdfkit.configuration(wkhtmltopdf=binary)
+
+
+# WeasyPrint renders in-process; wkhtmltopdf starts one process per PDF.
+PDF_BACKENDS = {
+    "weasyprint": _weasyprint_pdf,
+    "wkhtmltopdf": _wkhtmltopdf_pdf,
+}
+
+
+@lru_cache(maxsize=None)
+def get_pdf_backend(name=None):
+    name = name or PDF_BACKEND
+    if name != "auto":
+        return PDF_BACKENDS[name]
+    try:
+        import weasyprint  # noqa: F401
+        return PDF_BACKENDS["weasyprint"]
+    except (ImportError, OSError):
+        return PDF_BACKENDS["wkhtmltopdf"]
+
+
+def write_pdf(html, filename, backend=None):
+    """Write the PDF to filename, or return its bytes when filename is None."""
+    with telemetry.span("render", source="pdf"):
+        return get_pdf_backend(backend)(html, filename)
+
+
+def save_summary_pdf(summary: dict, filename="wellness_summary.pdf", html=None):
+    write_pdf(html or generate_email_html_from_summary(summary), filename)
@@ -0,0 +1,108 @@
+import hashlib
+import math
+import re
+from collections import Counter
+
+import dedup
+import store
+
+# BM25 term-frequency saturation and length normalization.
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Query weight of trend keywords relative to words from social buzz.
+TREND_WEIGHT = 3.0
+MAX_QUERY_TERMS = 200
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+a about after all also an and any are as at be been being but by can could did do does for from had has
+have how i if in into is it its just like may me more most my new no not of on or our out over so some
+such than that the their them then there these they this those through to up us was we were what when
+which who will with would you your study studies paper research results using based via vs
+""".split())
+
+
+def tokenize(text):
+    return [token for token in _TOKEN_RE.findall(dedup.normalize(text)) if len(token) > 1 and token not in STOPWORDS]
+
+
+def paper_text(paper):
+    return f"{paper.get('title', '')} {paper.get('summary', '')}"
+
+
+def doc_id(paper):
+    """Papers are keyed by normalized title, so the same paper from two backends is one document."""
+    return hashlib.blake2b(dedup.normalize(paper.get("title")).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def index_papers(papers):
+    """Add papers not yet in the persisted inverted index; already indexed papers are skipped."""
+    conn = store.connect()
+    by_id = {doc_id(paper): paper for paper in papers}
+    known = set()
+    ids = list(by_id)
+    for i in range(0, len(ids), 500):
+        chunk = ids[i:i + 500]
+        known.update(row[0] for row in conn.execute(
+            f"SELECT doc_id FROM paper_docs WHERE doc_id IN ({','.join('?' * len(chunk))})", chunk
+        ))
+    new = {key: Counter(tokenize(paper_text(paper))) for key, paper in by_id.items() if key not in known}
+    if not new:
+        return 0
+    with conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO paper_docs (doc_id, length) VALUES (?, ?)",
+            [(key, sum(counts.values())) for key, counts in new.items()],
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO paper_postings (term, doc_id, tf) VALUES (?, ?, ?)",
+            [(term, key, tf) for key, counts in new.items() for term, tf in counts.items()],
+        )
+    return len(new)
+
+
+def _corpus_stats(terms):
+    conn = store.connect()
+    total, avg_length = conn.execute("SELECT COUNT(*), AVG(length) FROM paper_docs").fetchone()
+    df = dict(conn.execute(
+        f"SELECT term, COUNT(*) FROM paper_postings WHERE term IN ({','.join('?' * len(terms))}) GROUP BY term",
+        list(terms),
+    ).fetchall())
+    return total, avg_length or 1.0, df
+
+
+def bm25_scores(papers, query):
+    """BM25 score of each paper for query ({term: weight}), using the whole index for IDF and length."""
+    if not papers or not query:
+        return [0.0] * len(papers)
+    total, avg_length, df = _corpus_stats(query)
+    idf = {term: math.log(1 + (total - df.get(term, 0) + 0.5) / (df.get(term, 0) + 0.5)) for term in query}
+    scores = []
+    for paper in papers:
+        counts = Counter(tokenize(paper_text(paper)))
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * sum(counts.values()) / avg_length)
+        scores.append(sum(
+            weight * idf[term] * counts[term] * (BM25_K1 + 1) / (counts[term] + norm)
+            for term, weight in query.items() if counts[term]
+        ))
+    return scores
+
+
+def build_query(trends, buzz_texts):
+    """Query terms from the week's trend keywords (weighted up) and social buzz."""
+    query = Counter()
+    for line in trends:
+        for term in tokenize(line.partition(":")[0]):
+            query[term] += TREND_WEIGHT
+    for text in buzz_texts:
+        for term in set(tokenize(text)):
+            query[term] += 1.0
+    return dict(query.most_common(MAX_QUERY_TERMS))
+
+
+def rank_papers(papers, query):
+    """Index the papers, then order them by relevance to query; ties keep their incoming order."""
+    index_papers(papers)
+    scores = bm25_scores(papers, query)
+    order = sorted(range(len(papers)), key=lambda i: -scores[i])
+    return [papers[i] for i in order]
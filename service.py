@@ -0,0 +1,192 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from pipeline import build_digest, get_last_week_date_range
+from summarizer import get_llm
+import telemetry
+import tools
+
+REFRESH_SECONDS = float(os.getenv("WELLNESS_REFRESH_SECONDS", "3600"))
+# How long a built digest is served before a request for its window rebuilds it.
+DIGEST_TTL_SECONDS = float(os.getenv("WELLNESS_DIGEST_TTL_SECONDS", str(REFRESH_SECONDS)))
+MAX_DIGESTS = 32
+
+CONTENT_TYPES = {
+    "html": "text/html; charset=utf-8",
+    "json": "application/json",
+    "pdf": "application/pdf",
+}
+
+
+class DigestService:
+    """Builds digests on demand, keeps recent ones in memory and shares in-flight builds.
+
+    Concurrent requests for the same window wait on a single build instead of
+    starting their own.
+    """
+
+    def __init__(self, out_dir, ttl=DIGEST_TTL_SECONDS):
+        self.out_dir = out_dir
+        self.ttl = ttl
+        self.digests = OrderedDict()
+        self.inflight = {}
+        self.latest = None
+        self._lock = threading.Lock()
+
+    def get(self, window, force=False):
+        with self._lock:
+            entry = self.digests.get(window)
+            if entry and not force and time.time() - entry["built_at"] < self.ttl:
+                self.digests.move_to_end(window)
+                return entry
+            future = self.inflight.get(window)
+            owner = future is None
+            if owner:
+                future = self.inflight[window] = Future()
+
+        if owner:
+            try:
+                future.set_result(self._build(window))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    del self.inflight[window]
+        return future.result()
+
+    def _build(self, window):
+        with telemetry.span("digest", window=f"{window[0]} {window[1]}"):
+            summary, html, pdf = build_digest(*window, self.out_dir)
+        entry = {"window": window, "built_at": time.time(), "json": json.dumps(summary, indent=2), "html": html, "pdf": pdf}
+        with self._lock:
+            self.digests[window] = entry
+            self.digests.move_to_end(window)
+            while len(self.digests) > MAX_DIGESTS:
+                self.digests.popitem(last=False)
+        return entry
+
+    def refresh_latest(self):
+        window = get_last_week_date_range()
+        entry = self.get(window, force=True)
+        self.latest = window
+        return entry
+
+    def get_latest(self):
+        return self.get(self.latest or get_last_week_date_range())
+
+    def refresh_forever(self, stop, interval=REFRESH_SECONDS):
+        """Rebuild last week's digest every interval; each refresh only syncs what is new since the last."""
+        while not stop.is_set():
+            try:
+                self.refresh_latest()
+                print(f"🔄 Refreshed digest for {self.latest[0]} to {self.latest[1]}")
+            except Exception as e:
+                print(f"⚠️ Scheduled refresh failed: {e}")
+            stop.wait(interval)
+
+
+def warm_clients():
+    """Import every backend and build the shared clients once, up front."""
+    for name in tools.BACKENDS:
+        tools.backend(name)
+    with tools._trends_lock:
+        tools.get_trends_client()
+    get_llm()
+    try:
+        with tools.reddit_client():
+            pass
+    except Exception as e:
+        print(f"⚠️ Reddit client not ready: {e}")
+
+
+def _parse_window(query):
+    start = query.get("start", [None])[0]
+    end = query.get("end", [None])[0]
+    if not start and not end:
+        return None
+    for value in (start, end):
+        datetime.strptime(value or "", "%Y-%m-%d")
+    if start >= end:
+        raise ValueError("start must be before end")
+    return start, end
+
+
+def make_handler(service):
+    class DigestHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, body, content_type, status=200, headers=None):
+            body = body if isinstance(body, bytes) else body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_json(self, payload, status=200):
+            self._send(json.dumps(payload), CONTENT_TYPES["json"], status)
+
+        def _send_digest(self, entry, fmt):
+            age = time.time() - entry["built_at"]
+            self._send(entry[fmt], CONTENT_TYPES[fmt], headers={
+                "X-Digest-Window": f"{entry['window'][0]} {entry['window'][1]}",
+                "X-Digest-Age-Seconds": f"{age:.0f}",
+            })
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            fmt = query.get("format", ["html"])[0]
+            try:
+                if url.path == "/health":
+                    self._send_json({"status": "ok", "latest": service.latest, "cached": len(service.digests)})
+                elif url.path == "/metrics":
+                    self._send(telemetry.prometheus_text(), "text/plain; version=0.0.4")
+                elif url.path in ("/digest", "/digest/latest"):
+                    if fmt not in CONTENT_TYPES:
+                        raise ValueError(f"format must be one of {', '.join(CONTENT_TYPES)}")
+                    window = None if url.path == "/digest/latest" else _parse_window(query)
+                    force = query.get("refresh", ["0"])[0] == "1"
+                    if window is None:
+                        entry = service.refresh_latest() if force else service.get_latest()
+                    else:
+                        entry = service.get(window, force=force)
+                    self._send_digest(entry, fmt)
+                else:
+                    self._send_json({"error": "not found"}, status=404)
+            except ValueError as e:
+                self._send_json({"error": str(e)}, status=400)
+            except Exception as e:
+                self._send_json({"error": f"digest failed: {e}"}, status=500)
+
+    return DigestHandler
+
+
+def run_service(host, port, out_dir, refresh_seconds=REFRESH_SECONDS):
+    """Serve digests over HTTP until interrupted, refreshing last week's in the background."""
+    print("🔥 Warming up clients...")
+    warm_clients()
+    service = DigestService(out_dir)
+    stop = threading.Event()
+    threading.Thread(target=service.refresh_forever, args=(stop, refresh_seconds), daemon=True).start()
+
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    print(f"🌐 Serving digests on http://{host}:{server.server_address[1]} "
+          "(/digest/latest, /digest?start=YYYY-MM-DD&end=YYYY-MM-DD, /health, /metrics)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
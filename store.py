@@ -0,0 +1,180 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import telemetry
+
+STORE_PATH = os.getenv("WELLNESS_STORE_PATH", "wellness_store.sqlite3")
+# Deltas shorter than this are not worth a network round trip; they are picked up by the next sync.
+MIN_DELTA_SECONDS = int(os.getenv("WELLNESS_STORE_MIN_DELTA", "300"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    source TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (source, item_id)
+);
+CREATE INDEX IF NOT EXISTS idx_items_source_ts ON items (source, ts);
+CREATE TABLE IF NOT EXISTS minhashes (
+    kind TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    signature TEXT NOT NULL,
+    first_ts REAL NOT NULL,
+    PRIMARY KEY (kind, digest)
+);
+CREATE TABLE IF NOT EXISTS minhash_bands (
+    kind TEXT NOT NULL,
+    band_key INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (kind, band_key, digest)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS paper_docs (
+    doc_id TEXT PRIMARY KEY,
+    length INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS paper_postings (
+    term TEXT NOT NULL,
+    doc_id TEXT NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term, doc_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sync_state (
+    source TEXT PRIMARY KEY,
+    low_ts REAL NOT NULL,
+    high_ts REAL NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+_local = threading.local()
+_sync_locks = {}
+_sync_locks_guard = threading.Lock()
+
+
+def connect():
+    """One connection per thread, created lazily with the schema in place."""
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "path", None) != STORE_PATH:
+        conn = sqlite3.connect(STORE_PATH, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        _local.conn = conn
+        _local.path = STORE_PATH
+    return conn
+
+
+def upsert_items(source, items):
+    """Insert or refresh items, each a (item_id, ts, payload) tuple."""
+    conn = connect()
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO items (source, item_id, ts, payload) VALUES (?, ?, ?, ?)",
+            [(source, str(item_id), ts, json.dumps(payload, default=str)) for item_id, ts, payload in items],
+        )
+
+
+def query_items(source, start_ts, end_ts):
+    """Payloads stored for source with start_ts <= ts < end_ts, newest first."""
+    rows = connect().execute(
+        "SELECT payload FROM items WHERE source = ? AND ts >= ? AND ts < ? ORDER BY ts DESC",
+        (source, start_ts, end_ts),
+    ).fetchall()
+    return [json.loads(payload) for (payload,) in rows]
+
+
+def get_sync_state(source):
+    row = connect().execute(
+        "SELECT low_ts, high_ts FROM sync_state WHERE source = ?", (source,)
+    ).fetchone()
+    return row
+
+
+def set_sync_state(source, low_ts, high_ts):
+    conn = connect()
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO sync_state (source, low_ts, high_ts, updated) VALUES (?, ?, ?, ?)",
+            (source, low_ts, high_ts, time.time()),
+        )
+
+
+class Partial(list):
+    """Items from a fetch that stopped early and only covers [since_ts, until_ts) of its range."""
+
+    def __init__(self, items, since_ts, until_ts):
+        super().__init__(items)
+        self.since_ts = since_ts
+        self.until_ts = until_ts
+
+
+def missing_ranges(source, start_ts, end_ts):
+    """Sub-ranges of [start_ts, end_ts) not yet synced, and the synced range they extend.
+
+    The synced range is None when there is nothing to extend: no coverage yet, or
+    coverage disjoint from the window, in which case a fresh contiguous range starts.
+    """
+    state = get_sync_state(source)
+    if state is None or start_ts > state[1] or end_ts < state[0]:
+        return [(start_ts, end_ts)], None
+
+    low_ts, high_ts = state
+    ranges = []
+    if start_ts < low_ts:
+        ranges.append((start_ts, low_ts))
+    if end_ts > high_ts:
+        ranges.append((high_ts, end_ts))
+    return ranges, (low_ts, high_ts)
+
+
+def extend_coverage(coverage, since_ts, until_ts):
+    """coverage grown by [since_ts, until_ts), or unchanged if that would leave a gap."""
+    if until_ts <= since_ts:
+        return coverage
+    if coverage is None:
+        return since_ts, until_ts
+    if since_ts > coverage[1] or until_ts < coverage[0]:
+        return coverage
+    return min(since_ts, coverage[0]), max(until_ts, coverage[1])
+
+
+def _sync_lock(source):
+    with _sync_locks_guard:
+        return _sync_locks.setdefault(source, threading.Lock())
+
+
+def sync_window(source, start_ts, end_ts, fetch, offline=False):
+    """Bring source up to date for [start_ts, end_ts) and return its items from the store.
+
+    fetch(since_ts, until_ts) is only called for the ranges outside the recorded
+    low/high-water marks and must return (item_id, ts, payload) tuples, as a Partial
+    if it stopped before covering the whole range. The marks only move over what was
+    actually fetched; a failed fetch leaves them as they were and the stored items
+    are returned regardless. With offline=True nothing is fetched.
+    """
+    # Never mark the future as synced: items newer than now can still arrive.
+    end_ts = min(end_ts, time.time())
+    if offline:
+        return query_items(source, start_ts, end_ts)
+    with _sync_lock(source):
+        ranges, coverage = missing_ranges(source, start_ts, end_ts)
+        if all(until_ts - since_ts < MIN_DELTA_SECONDS for since_ts, until_ts in ranges):
+            ranges = []
+        synced = coverage
+        for since_ts, until_ts in ranges:
+            try:
+                items = fetch(since_ts, until_ts)
+            except Exception as e:
+                print(f"⚠️ Could not sync {source}, using stored items: {e}")
+                telemetry.incr("source_fallbacks_total", source=source, reason="stored")
+                continue
+            upsert_items(source, items)
+            synced = extend_coverage(
+                synced, getattr(items, "since_ts", since_ts), getattr(items, "until_ts", until_ts)
+            )
+        if synced is not None and synced != coverage:
+            set_sync_state(source, *synced)
+    return query_items(source, start_ts, end_ts)
@@ -0,0 +1,382 @@
+import hashlib
+import json
+import os
+from functools import lru_cache
+from typing import List
+
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+
+import cache
+import telemetry
+from ratelimit import RateLimiter
+
+LLM_BASE_URL = "https://openrouter.ai/api/v1"
+LLM_MODEL = "mistralai/mistral-small-3.1-24b-instruct:free"
+SUMMARY_MAX_TOKENS = int(os.getenv("SUMMARY_MAX_TOKENS", "2000"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "120"))
+# Provider request quota; free OpenRouter models allow 20 requests a minute.
+llm_limiter = RateLimiter(int(os.getenv("LLM_REQUESTS_PER_MINUTE", "20")), 60)
+# Attempts a streamed summary gets before malformed output is treated as an error.
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "3"))
+
+SCRATCHPAD_TOKEN_BUDGET = int(os.getenv("SCRATCHPAD_TOKEN_BUDGET", "1500"))
+# Longest any single scratchpad entry may be before it is truncated.
+ITEM_TOKEN_LIMIT = 120
+# Sections in the order they are kept when the budget is tight; entries are dropped from
+# the last ones first, down to SECTION_MIN_ITEMS each.
+SECTION_PRIORITY = ["NOTABLE INSIGHTS", "POPULAR TRENDS", "SOCIAL BUZZ"]
+SECTION_MIN_ITEMS = 2
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    """The tiktoken encoding, loaded on first use; None falls back to ~4 characters per token."""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+class WellnessInsight(BaseModel):
+    date: str = Field(description="Date in YYYY-MM-DD")
+    title: str = Field(description="Brief title of the insight")
+    description: str = Field(description="Detailed explanation of the wellness insight")
+    impact: str = Field(description="Why this insight matters for wellness")
+    source: str = Field(description="Source of the insight")
+    category: str = Field(description="Area of wellness (e.g., Nutrition, Exercise, Mental Health, Sleep, Longevity)")
+
+class WellnessSummary(BaseModel):
+    time_period: str
+    popular_trends: List[str]
+    social_buzz: List[str]
+    notable_insights: List[WellnessInsight]
+    lifestyle_recommendations: str
+    future_outlook: str
+
+
+_FIELD_ADAPTERS = {name: TypeAdapter(field.annotation) for name, field in WellnessSummary.model_fields.items()}
+
+
+SYSTEM_PROMPT = """
+You are a Wellness Timeline Generator.
+
+Your task is to generate a structured wellness summary based strictly on the real data provided below. You may use creativity and engaging language **only in how the summary is written**, but **not in the factual content** (e.g., trends, tweets, Reddit posts, research papers).
+
+ONLY use the following data sections to generate content:
+1. POPULAR TRENDS — Google Trends data
+2. SOCIAL BUZZ — top tweets/X posts and Reddit posts
+3. NOTABLE INSIGHTS — research papers
+
+Do NOT fabricate or assume information from other platforms like TikTok, Pinterest, or HubSpot unless the data includes it explicitly.
+
+Time Period: {start_date} to {end_date}
+
+IMPORTANT: You must return your response as a single JSON string that matches this exact structure:
+{{
+    "time_period": "string (e.g., 'Last Week')",
+    "popular_trends": ["string", "string", ...],
+    "social_buzz": ["string", "string", ...],
+    "notable_insights": [
+        {{
+            "date": "YYYY-MM-DD",
+            "title": "string",
+            "description": "string",
+            "impact": "string",
+            "source": "string",
+            "category": "string"
+        }},
+        ...
+    ],
+    "lifestyle_recommendations": "string",
+    "future_outlook": "string"
+}}
+
+Do not include any additional text or formatting. Return ONLY the JSON string.
+"""
+
+
+@lru_cache(maxsize=None)
+def get_llm(temperature=0.6):
+    """The chat client, built once per temperature and reused across calls."""
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
+        base_url=LLM_BASE_URL,
+        model=LLM_MODEL,
+        temperature=temperature,
+        max_tokens=SUMMARY_MAX_TOKENS,
+        timeout=LLM_TIMEOUT_SECONDS,
+        stream_usage=True,
+    )
+
+
+def count_tokens(text):
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def truncate_tokens(text, limit):
+    """text cut to at most limit tokens, including the "..." that marks the cut."""
+    if count_tokens(text) <= limit:
+        return text
+    encoding = _encoding()
+    keep = limit - count_tokens("...")
+    while True:
+        if encoding is not None:
+            truncated = encoding.decode(encoding.encode(text)[:max(0, keep)]).rstrip() + "..."
+        else:
+            truncated = text[:max(0, keep) * 4].rstrip() + "..."
+        # Tokens can merge across the cut, so shorten until the result fits.
+        if keep <= 0 or count_tokens(truncated) <= limit:
+            return truncated
+        keep -= 1
+
+
+def compact_scratchpad(sections, budget=SCRATCHPAD_TOKEN_BUDGET):
+    """Render {title: [entries]} as the scratchpad, compacted to fit the token budget.
+
+    Each entry is truncated to ITEM_TOKEN_LIMIT first; if that is not enough, entries
+    are dropped from the end of the lowest-priority sections, and as a last resort the
+    remaining entries are shortened in the same order.
+    """
+    sections = {title: [truncate_tokens(entry, ITEM_TOKEN_LIMIT) for entry in entries] for title, entries in sections.items()}
+
+    def render():
+        return "\n\n".join(f"{title}:\n" + "\n".join(entries) for title, entries in sections.items())
+
+    text = render()
+    lowest_first = list(reversed([t for t in SECTION_PRIORITY if t in sections]))
+    for title in lowest_first:
+        entries = sections[title]
+        while count_tokens(text) > budget and len(entries) > SECTION_MIN_ITEMS:
+            entries.pop()
+            text = render()
+    for title in lowest_first:
+        entries = sections[title]
+        for i in reversed(range(len(entries))):
+            while count_tokens(text) > budget and count_tokens(entries[i]) > 1:
+                overflow = count_tokens(text) - budget
+                entries[i] = truncate_tokens(entries[i], max(1, count_tokens(entries[i]) - overflow))
+                text = render()
+    return text
+
+
+def clean_llm_output(text):
+    """Strip markdown-style json code block markers if present."""
+    output = text.strip()
+    if output.startswith("```"):
+        output = output.removeprefix("```json").removeprefix("```").removesuffix("```").strip()
+    return output
+
+
+class MalformedOutput(ValueError):
+    pass
+
+
+class SummaryStreamParser:
+    """Incrementally parse the summary JSON as it streams in.
+
+    feed() returns each top-level field as soon as its value is complete and validated,
+    and raises MalformedOutput at the first character or field that cannot belong to a
+    WellnessSummary, so a bad completion can be abandoned without waiting for the rest.
+    """
+
+    def __init__(self):
+        self.state = "prefix"
+        self.prefix = ""
+        self.buffer = ""
+        self.key = None
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.fields = {}
+
+    def feed(self, text):
+        completed = []
+        for ch in text:
+            field = self._step(ch)
+            if field:
+                completed.append(field)
+        return completed
+
+    def close(self):
+        if self.state != "done":
+            raise MalformedOutput("output ended before the JSON object was closed")
+        try:
+            return WellnessSummary.model_validate(self.fields).model_dump()
+        except ValidationError as e:
+            raise MalformedOutput(str(e)) from e
+
+    def _step(self, ch):
+        state = self.state
+        if state == "prefix":
+            # Allow a leading ```json fence, as clean_llm_output does.
+            if ch == "{":
+                self.state = "key_start"
+            else:
+                self.prefix += ch
+                if not "```json".startswith(self.prefix.strip().lower()):
+                    raise MalformedOutput(f"unexpected text before the JSON object: {self.prefix.strip()[:40]!r}")
+        elif state in ("key_start", "colon", "after_value"):
+            if ch.isspace():
+                return None
+            if state == "key_start" and ch == '"':
+                self.state, self.buffer = "key", ""
+            elif state == "colon" and ch == ":":
+                self.state = "value_start"
+            elif state == "after_value" and ch == ",":
+                self.state = "key_start"
+            elif state == "after_value" and ch == "}":
+                self.state = "done"
+            else:
+                raise MalformedOutput(f"unexpected {ch!r} in the summary object")
+        elif state == "key":
+            if self._in_string(ch):
+                self.buffer += ch
+            else:
+                self.key = json.loads(f'"{self.buffer}"')
+                self.state = "colon"
+        elif state == "value_start":
+            if ch.isspace():
+                return None
+            if ch not in '"[{-0123456789tfn':
+                raise MalformedOutput(f"unexpected {ch!r} at the start of {self.key!r}")
+            self.state, self.buffer = "value", ""
+            return self._value_char(ch)
+        elif state == "value":
+            return self._value_char(ch)
+        elif state == "done":
+            if not (ch.isspace() or ch == "`"):
+                raise MalformedOutput("unexpected text after the JSON object")
+        return None
+
+    def _in_string(self, ch):
+        """Track string escapes; False once ch closes the current string."""
+        if self.escaped:
+            self.escaped = False
+        elif ch == "\\":
+            self.escaped = True
+        elif ch == '"':
+            return False
+        return True
+
+    def _value_char(self, ch):
+        if self.in_string:
+            self.buffer += ch
+            self.in_string = self._in_string(ch)
+            if not self.in_string and self.depth == 0:
+                return self._finish_value(self.buffer, "after_value")
+            return None
+        if self.depth == 0 and ch in ",}" and self.buffer:
+            # A bare scalar ends at the next delimiter.
+            return self._finish_value(self.buffer.strip(), "key_start" if ch == "," else "done")
+        self.buffer += ch
+        if ch == '"':
+            self.in_string = True
+        elif ch in "[{":
+            self.depth += 1
+        elif ch in "]}":
+            self.depth -= 1
+            if self.depth == 0:
+                return self._finish_value(self.buffer, "after_value")
+        return None
+
+    def _finish_value(self, text, next_state):
+        self.state = next_state
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise MalformedOutput(f"invalid JSON for {self.key!r}: {e}") from e
+        adapter = _FIELD_ADAPTERS.get(self.key)
+        if adapter is None:
+            return None
+        try:
+            value = adapter.dump_python(adapter.validate_python(value))
+        except ValidationError as e:
+            raise MalformedOutput(f"invalid {self.key!r}: {e}") from e
+        self.fields[self.key] = value
+        return self.key, value
+
+
+def record_token_usage(message):
+    usage = getattr(message, "usage_metadata", None) or {}
+    if usage.get("input_tokens"):
+        telemetry.incr("llm_tokens_total", usage["input_tokens"], kind="prompt")
+    if usage.get("output_tokens"):
+        telemetry.incr("llm_tokens_total", usage["output_tokens"], kind="completion")
+
+
+def _summary_request(scratchpad, start_date, end_date):
+    messages = [
+        ("system", SYSTEM_PROMPT.format(start_date=start_date, end_date=end_date)),
+        ("human", f"Generate the wellness summary from this data:\n\n{scratchpad}"),
+    ]
+    key = hashlib.sha256(json.dumps([LLM_MODEL, messages]).encode("utf-8")).hexdigest()
+    return messages, key
+
+
+def summarize(scratchpad, start_date, end_date, llm=None):
+    """Generate the WellnessSummary for a scratchpad with one direct LLM call.
+
+    Parsed summaries are cached by a hash of the prompt and scratchpad, so identical
+    inputs never reach the LLM twice.
+    """
+    from langchain_core.output_parsers import PydanticOutputParser
+    parser = PydanticOutputParser(pydantic_object=WellnessSummary)
+    messages, key = _summary_request(scratchpad, start_date, end_date)
+
+    def generate():
+        llm_limiter.acquire()
+        with telemetry.span("llm", source=LLM_MODEL):
+            response = (llm or get_llm()).invoke(messages)
+        record_token_usage(response)
+        with telemetry.span("parse", source="llm"):
+            return parser.parse(clean_llm_output(response.content)).model_dump()
+
+    return cache.cached_fetch("llm", key, start_date, end_date, generate)
+
+
+def stream_summary(scratchpad, start_date, end_date, on_field=None, on_retry=None, llm=None):
+    """Like summarize(), but stream the completion and report each field as soon as it parses.
+
+    on_field(field, value) is called once per summary field in completion order; on a
+    cache hit it is called for every field straight away. Malformed output is abandoned
+    at the first bad field and retried, calling on_retry(attempt), up to LLM_MAX_ATTEMPTS.
+    """
+    messages, key = _summary_request(scratchpad, start_date, end_date)
+    on_field = on_field or (lambda field, value: None)
+    streamed = False
+
+    def generate():
+        nonlocal streamed
+        for attempt in range(1, LLM_MAX_ATTEMPTS + 1):
+            parser = SummaryStreamParser()
+            message = None
+            llm_limiter.acquire()
+            try:
+                with telemetry.span("llm", source=LLM_MODEL):
+                    for chunk in (llm or get_llm()).stream(messages):
+                        message = chunk if message is None else message + chunk
+                        if isinstance(chunk.content, str):
+                            for field, value in parser.feed(chunk.content):
+                                streamed = True
+                                on_field(field, value)
+                    return parser.close()
+            except MalformedOutput as e:
+                print(f"⚠️ Malformed summary output (attempt {attempt}/{LLM_MAX_ATTEMPTS}): {e}")
+                telemetry.incr("llm_retries_total")
+                if attempt == LLM_MAX_ATTEMPTS:
+                    raise
+                if on_retry:
+                    on_retry(attempt)
+            finally:
+                if message is not None:
+                    record_token_usage(message)
+
+    summary = cache.cached_fetch("llm", key, start_date, end_date, generate)
+    if not streamed:
+        for field, value in summary.items():
+            on_field(field, value)
+    return summary
@@ -0,0 +1,139 @@
+import contextvars
+import collections
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+TRACE_FILE = os.getenv("WELLNESS_TRACE_FILE", "wellness_trace.json")
+METRICS_FILE = os.getenv("WELLNESS_METRICS_FILE", "wellness_metrics.prom")
+METRIC_PREFIX = "wellness_"
+# Spans kept for the trace; a long-running service keeps only the most recent ones.
+MAX_SPANS = 10000
+
+METRIC_HELP = {
+    "span_duration_seconds": "Time spent in pipeline spans (fetch, sync, parse, llm, render).",
+    "http_requests_total": "HTTP requests sent by the shared client, by host and status.",
+    "http_response_bytes_total": "Response body bytes received by the shared client.",
+    "http_retries_total": "HTTP requests retried after an error or rate limit.",
+    "cache_requests_total": "Response cache lookups, by source and result.",
+    "llm_tokens_total": "LLM tokens used, by kind.",
+    "llm_retries_total": "Streamed summaries abandoned as malformed and retried.",
+    "source_fallbacks_total": "Times a source failed or returned placeholder data.",
+}
+
+_lock = threading.Lock()
+_spans = collections.deque(maxlen=MAX_SPANS)
+_counters = {}
+_durations = {}
+_ids = itertools.count(1)
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+def _labels_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def incr(name, value=1, **labels):
+    with _lock:
+        key = (name, _labels_key(labels))
+        _counters[key] = _counters.get(key, 0) + value
+
+
+@contextmanager
+def span(name, **attributes):
+    """Time a block as a span; spans opened inside it on the same thread become its children."""
+    span_id = next(_ids)
+    record = {
+        "id": span_id,
+        "parent": _current_span.get(),
+        "name": name,
+        "attributes": attributes,
+        "thread": threading.current_thread().name,
+        "start": time.time(),
+        "status": "ok",
+    }
+    token = _current_span.set(span_id)
+    started = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        record["status"] = "error"
+        record["error"] = str(e)
+        raise
+    finally:
+        record["duration"] = time.perf_counter() - started
+        _current_span.reset(token)
+        labels = {"name": name, "source": attributes.get("source", "")}
+        with _lock:
+            _spans.append(record)
+            key = _labels_key(labels)
+            total, count = _durations.get(key, (0.0, 0))
+            _durations[key] = (total + record["duration"], count + 1)
+
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+        _durations.clear()
+
+
+def snapshot():
+    with _lock:
+        return {
+            "spans": list(_spans),
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(_counters.items())
+            ],
+        }
+
+
+def write_trace(path=None):
+    path = path or TRACE_FILE
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f, indent=2, default=str)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    def escape(value):
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels) + "}"
+
+
+def prometheus_text():
+    lines = []
+    with _lock:
+        counters = sorted(_counters.items())
+        durations = sorted(_durations.items())
+
+    name = f"{METRIC_PREFIX}span_duration_seconds"
+    lines.append(f"# HELP {name} {METRIC_HELP['span_duration_seconds']}")
+    lines.append(f"# TYPE {name} summary")
+    for labels, (total, count) in durations:
+        lines.append(f"{name}_sum{_format_labels(labels)} {total:.6f}")
+        lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+    for metric in sorted({metric for metric, _ in (key for key, _ in counters)}):
+        name = f"{METRIC_PREFIX}{metric}"
+        lines.append(f"# HELP {name} {METRIC_HELP.get(metric, metric)}")
+        lines.append(f"# TYPE {name} counter")
+        for (counter, labels), value in counters:
+            if counter == metric:
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path=None):
+    """Write metrics in the node_exporter textfile format, atomically."""
+    path = path or METRICS_FILE
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(prometheus_text())
+    os.replace(tmp_path, path)
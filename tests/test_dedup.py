@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+
+import dedup
+import store
+
+DAY = 24 * 3600
+
+DUPLICATES = [
+    # SerpAPI tags file results.
+    ("[PDF] Effects of mindfulness meditation on sleep quality in older adults",
+     "Effects of mindfulness meditation on sleep quality in older adults"),
+    # A retweet of the original post.
+    ("RT @bob: Just finished a 30 day yoga challenge and my back pain is gone",
+     "Just finished a 30 day yoga challenge and my back pain is gone"),
+    # Titles cut short by one backend.
+    ("Effects of a mindfulness-based intervention on sleep quality and stress in a ...",
+     "Effects of a mindfulness-based intervention on sleep quality and stress in a randomized trial of nurses"),
+    ("Intermittent fasting improves insulin sensitivity in adults with obesity",
+     "Intermittent fasting improves insulin sensi…"),
+    # Punctuation and wording differences between backends.
+    ("Mindfulness-based stress reduction for burnout in nurses",
+     "Mindfulness based stress reduction for burnout among nurses"),
+    ("Cross-posted: This yoga pose transformed my posture in 2 weeks!",
+     "This yoga pose transformed my posture in 2 weeks"),
+]
+
+DISTINCT = [
+    ("Best apps for tracking sleep patterns effectively", "Best apps for tracking your running workouts"),
+    ("Effects of mindfulness meditation on sleep quality in older adults",
+     "Effects of resistance training on sleep quality in older adults"),
+    ("Sleep regularity and mood in adolescents", "Sleep duration and academic performance in adolescents"),
+    ("How intermittent fasting helped me boost my energy levels", "Plant-based diet: What worked for me"),
+]
+
+
+class DedupTestCase(unittest.TestCase):
+    def setUp(self):
+        self._previous_path = store.STORE_PATH
+        self._dir = tempfile.TemporaryDirectory()
+        store.STORE_PATH = os.path.join(self._dir.name, "store.sqlite3")
+
+    def tearDown(self):
+        store.connect().close()
+        store.STORE_PATH = self._previous_path
+        self._dir.cleanup()
+
+
+class DedupeTest(DedupTestCase):
+    def test_near_duplicate_variants_are_dropped(self):
+        for original, variant in DUPLICATES:
+            with self.subTest(variant=variant):
+                self.assertEqual(dedup.dedupe([original, variant], str), [original])
+
+    def test_distinct_items_are_kept(self):
+        for first, second in DISTINCT:
+            with self.subTest(first=first, second=second):
+                self.assertEqual(dedup.dedupe([first, second], str), [first, second])
+
+    def test_first_of_each_group_is_kept(self):
+        records = [variant for _, variant in DUPLICATES] + [original for original, _ in DUPLICATES]
+        self.assertEqual(dedup.dedupe(records, str), [variant for _, variant in DUPLICATES])
+
+    def test_signature_estimate_agrees_on_variants(self):
+        for original, variant in DUPLICATES[:2]:
+            signatures = [dedup.minhash(dedup.features(text)) for text in (original, variant)]
+            self.assertGreaterEqual(dedup.similarity(*signatures), dedup.JACCARD_THRESHOLD)
+
+
+class SeenBeforeTest(DedupTestCase):
+    def dedupe_week(self, texts, week_start_ts):
+        return dedup.dedupe(
+            [(text, week_start_ts + DAY) for text in texts], lambda record: record[0],
+            kind="buzz", ts_fn=lambda record: record[1], window_start_ts=week_start_ts,
+        )
+
+    def test_items_seen_in_an_earlier_week_are_dropped(self):
+        original, variant = DUPLICATES[1]
+        self.dedupe_week([original], 0)
+        self.assertEqual(self.dedupe_week([variant], 7 * DAY), [])
+
+    def test_same_week_rerun_keeps_its_items(self):
+        original, _ = DUPLICATES[1]
+        self.dedupe_week([original], 7 * DAY)
+        self.assertEqual(len(self.dedupe_week([original], 7 * DAY)), 1)
+
+    def test_distinct_items_from_an_earlier_week_are_kept(self):
+        first, second = DISTINCT[0]
+        self.dedupe_week([first], 0)
+        self.assertEqual(len(self.dedupe_week([second], 7 * DAY)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
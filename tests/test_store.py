@@ -0,0 +1,111 @@
+import os
+import tempfile
+import time
+import unittest
+
+import store
+
+HOUR = 3600
+
+
+class StoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self._previous_path = store.STORE_PATH
+        self._dir = tempfile.TemporaryDirectory()
+        store.STORE_PATH = os.path.join(self._dir.name, "store.sqlite3")
+        # A window well in the past, so sync_window never clamps it to now.
+        self.start = float(int(time.time()) - 10 * 24 * HOUR)
+        self.end = self.start + 7 * 24 * HOUR
+        self.calls = []
+
+    def tearDown(self):
+        store.connect().close()
+        store.STORE_PATH = self._previous_path
+        self._dir.cleanup()
+
+    def fetch_hourly(self, since_ts, until_ts):
+        """One item per hour of the range."""
+        self.calls.append((since_ts, until_ts))
+        return [(f"item-{ts:.0f}", ts, {"ts": ts}) for ts in range(int(since_ts), int(until_ts), HOUR)]
+
+    def fetch_failing(self, since_ts, until_ts):
+        self.calls.append((since_ts, until_ts))
+        raise ConnectionError("source down")
+
+
+class MissingRangesTest(StoreTestCase):
+    def test_no_coverage_starts_a_fresh_range(self):
+        self.assertEqual(store.missing_ranges("src", self.start, self.end), ([(self.start, self.end)], None))
+
+    def test_window_inside_coverage_needs_nothing(self):
+        store.set_sync_state("src", self.start, self.end)
+        ranges, coverage = store.missing_ranges("src", self.start + HOUR, self.end - HOUR)
+        self.assertEqual(ranges, [])
+        self.assertEqual(coverage, (self.start, self.end))
+
+    def test_window_around_coverage_needs_both_sides(self):
+        store.set_sync_state("src", self.start + HOUR, self.end - HOUR)
+        ranges, coverage = store.missing_ranges("src", self.start, self.end)
+        self.assertEqual(ranges, [(self.start, self.start + HOUR), (self.end - HOUR, self.end)])
+        self.assertEqual(coverage, (self.start + HOUR, self.end - HOUR))
+
+    def test_disjoint_coverage_starts_a_fresh_range(self):
+        store.set_sync_state("src", self.end + HOUR, self.end + 2 * HOUR)
+        self.assertEqual(store.missing_ranges("src", self.start, self.end), ([(self.start, self.end)], None))
+
+
+class SyncWindowTest(StoreTestCase):
+    def test_second_sync_reads_locally(self):
+        first = store.sync_window("src", self.start, self.end, self.fetch_hourly)
+        second = store.sync_window("src", self.start, self.end, self.fetch_hourly)
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(first, second)
+        self.assertEqual(len(first), 7 * 24)
+
+    def test_only_the_delta_is_fetched(self):
+        store.sync_window("src", self.start, self.end - 24 * HOUR, self.fetch_hourly)
+        store.sync_window("src", self.start, self.end, self.fetch_hourly)
+        self.assertEqual(self.calls[-1], (self.end - 24 * HOUR, self.end))
+        self.assertEqual(store.get_sync_state("src"), (self.start, self.end))
+
+    def test_failed_delta_keeps_stored_items_and_sync_state(self):
+        stored = store.sync_window("src", self.start, self.end - 24 * HOUR, self.fetch_hourly)
+        items = store.sync_window("src", self.start, self.end, self.fetch_failing)
+        self.assertEqual(items, stored)
+        self.assertEqual(store.get_sync_state("src"), (self.start, self.end - 24 * HOUR))
+
+    def test_failed_first_sync_records_nothing(self):
+        self.assertEqual(store.sync_window("src", self.start, self.end, self.fetch_failing), [])
+        self.assertIsNone(store.get_sync_state("src"))
+
+    def test_partial_fetch_only_marks_what_it_reached(self):
+        reached = self.end - 24 * HOUR
+
+        def fetch_newest_day(since_ts, until_ts):
+            self.calls.append((since_ts, until_ts))
+            return store.Partial(self.fetch_hourly(reached, until_ts), reached, until_ts)
+
+        store.sync_window("src", self.start, self.end, fetch_newest_day)
+        self.assertEqual(store.get_sync_state("src"), (reached, self.end))
+        # The next sync continues below what the first one reached.
+        store.sync_window("src", self.start, self.end, self.fetch_hourly)
+        self.assertEqual(self.calls[-1], (self.start, reached))
+        self.assertEqual(store.get_sync_state("src"), (self.start, self.end))
+
+    def test_partial_delta_leaves_a_gap_unsynced(self):
+        store.sync_window("src", self.start, self.end - 24 * HOUR, self.fetch_hourly)
+        reached = self.end - HOUR
+
+        def fetch_newest_hour(since_ts, until_ts):
+            return store.Partial(self.fetch_hourly(reached, until_ts), reached, until_ts)
+
+        store.sync_window("src", self.start, self.end, fetch_newest_hour)
+        self.assertEqual(store.get_sync_state("src"), (self.start, self.end - 24 * HOUR))
+
+    def test_offline_never_fetches(self):
+        self.assertEqual(store.sync_window("src", self.start, self.end, self.fetch_failing, offline=True), [])
+        self.assertEqual(self.calls, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
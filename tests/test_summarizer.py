@@ -0,0 +1,43 @@
+import unittest
+
+import summarizer
+
+
+def sections(entry_words):
+    entry = " ".join(["wellness"] * entry_words)
+    return {
+        "POPULAR TRENDS": [f"- Trend {i}: {entry}" for i in range(5)],
+        "SOCIAL BUZZ": [f"- Buzz {i}: {entry}" for i in range(5)],
+        "NOTABLE INSIGHTS": [f"Paper {i}: {entry}" for i in range(5)],
+    }
+
+
+class CompactScratchpadTest(unittest.TestCase):
+    def test_truncated_text_fits_the_limit(self):
+        text = " ".join(["wellness"] * 500)
+        for limit in (1, 2, 10, 300):
+            with self.subTest(limit=limit):
+                truncated = summarizer.truncate_tokens(text, limit)
+                self.assertTrue(truncated.endswith("..."))
+                self.assertLessEqual(summarizer.count_tokens(truncated), limit)
+
+    def test_fits_the_budget(self):
+        for budget in (100, 300, 1000):
+            with self.subTest(budget=budget):
+                scratchpad = summarizer.compact_scratchpad(sections(200), budget)
+                self.assertLessEqual(summarizer.count_tokens(scratchpad), budget)
+
+    def test_highest_priority_section_is_shortened_last(self):
+        scratchpad = summarizer.compact_scratchpad(sections(20), 250)
+        insights = scratchpad.split("NOTABLE INSIGHTS:\n")[1].split("\n\n")[0].splitlines()
+        self.assertEqual(insights, sections(20)["NOTABLE INSIGHTS"][:summarizer.SECTION_MIN_ITEMS])
+        self.assertIn("...", scratchpad.split("SOCIAL BUZZ:\n")[1])
+
+    def test_small_scratchpad_is_unchanged(self):
+        scratchpad = summarizer.compact_scratchpad(sections(2), 1500)
+        self.assertEqual(scratchpad.count("\n- "), 10)
+        self.assertNotIn("...", scratchpad)
+
+
+if __name__ == "__main__":
+    unittest.main()
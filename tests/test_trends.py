@@ -0,0 +1,92 @@
+import os
+import tempfile
+import time
+import unittest
+
+import pandas as pd
+
+import cache
+import ratelimit
+import store
+import tools
+
+DAY = 24 * 3600
+
+
+def interest(keyword, day):
+    """The true, unscaled interest in keyword on day."""
+    return (len(keyword) + day.day) * (1 + day.dayofyear % 7)
+
+
+class FakeTrendReq:
+    """Scales each payload so its peak is 100, like Google Trends."""
+
+    def __init__(self):
+        self.partial_from = None
+
+    def build_payload(self, kw_list, timeframe=""):
+        self.kw_list = list(kw_list)
+        self.timeframe = timeframe
+
+    def interest_over_time(self):
+        start, end = self.timeframe.split()
+        index = pd.date_range(start, end, freq="D", name="date")
+        values = {kw: [interest(kw, day) for day in index] for kw in self.kw_list}
+        peak = max(max(column) for column in values.values())
+        frame = pd.DataFrame({kw: [v * 100 / peak for v in column] for kw, column in values.items()}, index=index)
+        frame["isPartial"] = False if self.partial_from is None else index >= self.partial_from
+        return frame
+
+
+class TrendPointsTest(unittest.TestCase):
+    def setUp(self):
+        self._previous = store.STORE_PATH, cache.CACHE_DIR, tools._trends_client, tools.trends_limiter
+        self._dir = tempfile.TemporaryDirectory()
+        store.STORE_PATH = os.path.join(self._dir.name, "store.sqlite3")
+        cache.CACHE_DIR = os.path.join(self._dir.name, "cache")
+        self.trends = tools._trends_client = FakeTrendReq()
+        tools.trends_limiter = ratelimit.RateLimiter(rate=1e6, burst=10**6)
+        today_ts = time.time() // DAY * DAY
+        self.start = today_ts - 60 * DAY
+
+    def tearDown(self):
+        store.connect().close()
+        store.STORE_PATH, cache.CACHE_DIR, tools._trends_client, tools.trends_limiter = self._previous
+        self._dir.cleanup()
+
+    def sync(self, first_day, last_day):
+        return store.sync_window("trends", self.start + first_day * DAY, self.start + last_day * DAY, tools.fetch_trend_points)
+
+    def assert_one_scale(self, points):
+        scales = {
+            round(point["value"] / interest(point["keyword"], pd.Timestamp(point["date"])), 9)
+            for point in points
+        }
+        self.assertEqual(len(scales), 1, scales)
+
+    def test_high_side_extension_keeps_the_stored_scale(self):
+        self.sync(0, 10)
+        points = self.sync(0, 20)
+        self.assertEqual(len({point["date"] for point in points}), 20)
+        self.assert_one_scale(points)
+
+    def test_low_side_extension_keeps_the_stored_scale(self):
+        self.sync(10, 20)
+        points = self.sync(0, 20)
+        self.assertEqual(len({point["date"] for point in points}), 20)
+        self.assert_one_scale(points)
+
+    def test_partial_day_is_neither_stored_nor_synced(self):
+        self.trends.partial_from = pd.Timestamp(self.start + 9 * DAY, unit="s")
+        points = self.sync(0, 10)
+        self.assertEqual(len({point["date"] for point in points}), 9)
+        self.assertEqual(store.get_sync_state("trends"), (self.start, self.start + 9 * DAY))
+        # Once the day is complete, the next sync fetches it on the stored scale.
+        self.trends.partial_from = None
+        points = self.sync(0, 12)
+        self.assertEqual(len({point["date"] for point in points}), 12)
+        self.assert_one_scale(points)
+
+
+if __name__ == "__main__":
+    unittest.main()